@@ -0,0 +1,42 @@
+"""
+Conditional GET (ETag / If-None-Match) helpers for City Care API.
+
+Validators are computed from cheap indexed aggregates instead of the
+rendered body, so an unchanged poll costs a couple of index lookups and no
+serialization.
+"""
+
+import hashlib
+
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+
+def make_etag(*parts):
+    """Build a quoted ETag from arbitrary validator parts."""
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def latest_change_etag(request, *sources):
+    """
+    ETag for any page of a list: the full URL (page cursor, filters,
+    serializer switches, host) plus the newest value of each
+    (queryset, field) source. Each is an indexed MAX, so the check costs
+    the same whatever the filter or page, but any change to the table
+    invalidates every page.
+    """
+    latest = [queryset.order_by().aggregate(last=Max(field))['last'] for queryset, field in sources]
+    return make_etag(request.build_absolute_uri(), *latest)
+
+
+def conditional_response(request, etag, render):
+    """
+    Return 304 if the client already has `etag`, otherwise call render().
+    Responses carry the ETag and ask browsers to always revalidate.
+    """
+    response = get_conditional_response(request, etag=etag) or render()
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,68 @@
+"""
+Lazily created, per-process clients for optional external backends.
+
+Settings only describe a backend (e.g. MONGO_URI); nothing is imported or
+connected until code first asks for the client. Clients are not shared
+across a fork, so a pre-forking server gives each worker its own.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+
+
+class ConnectionRegistry:
+    """Named client factories, each called at most once per process."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._factories = {}
+        self._clients = {}
+        self._pid = os.getpid()
+    
+    def register(self, name, factory):
+        self._factories[name] = factory
+    
+    def get(self, name):
+        if self._pid != os.getpid():
+            # Forked: the parent's clients (and their threads/sockets) are not ours
+            with self._lock:
+                self._clients = {}
+                self._pid = os.getpid()
+        
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = self._clients[name] = self._factories[name]()
+        return client
+    
+    def is_connected(self, name):
+        return name in self._clients and self._pid == os.getpid()
+    
+    def close_all(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            close = getattr(client, 'close', None)
+            if close is not None:
+                close()
+
+
+connections = ConnectionRegistry()
+
+
+def _mongo_client():
+    import pymongo
+    
+    return pymongo.MongoClient(settings.MONGO_URI)
+
+
+connections.register('mongo', _mongo_client)
+
+
+def mongo_db():
+    """The project's MongoDB database, connecting on first use."""
+    return connections.get('mongo')[settings.MONGO_DB_NAME]
@@ -0,0 +1,173 @@
+"""
+Automatic dispatch of open complaints to collectors.
+
+Complaints are matched greedily, most urgent first, to the collector with
+the lowest cost: travel distance from the collector's position plus a
+penalty per open job they already hold. Distances are computed in
+vectorized blocks, so thousands of complaints against hundreds of
+collectors plan in well under a second.
+"""
+
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from .escalation import restart_escalation
+from .events import publish_complaint_event
+from .locking import lock_complaints_for_update
+from .models import Complaint, User
+from .stats import invalidate_complaint_stats
+from .utils import haversine_matrix, np
+
+# Statuses that count towards a collector's workload
+OPEN_STATUSES = ('ASSIGNED', 'ESCALATED')
+# Unassigned complaints in these statuses are eligible for dispatch
+DISPATCHABLE_STATUSES = ('PENDING', 'ESCALATED')
+# Complaint rows per distance block (bounds memory for large backlogs)
+BLOCK_SIZE = 2048
+
+
+def collector_states(collectors):
+    """
+    Position and open load per collector, as {id: (lat, lng, load)}.
+    The position is the collector's home, else the centroid of their open
+    work, else DISPATCH_DEFAULT_CENTER.
+    """
+    default_lat, default_lng = settings.DISPATCH_DEFAULT_CENTER
+    open_work = {
+        row['assigned_to_id']: row
+        for row in Complaint.objects.filter(
+            assigned_to__in=[collector.id for collector in collectors],
+            status__in=OPEN_STATUSES,
+        ).values('assigned_to_id').annotate(
+            load=Count('id'), lat=Avg('latitude'), lng=Avg('longitude'),
+        ).order_by()
+    }
+    
+    states = {}
+    for collector in collectors:
+        work = open_work.get(collector.id, {})
+        if collector.home_latitude is not None and collector.home_longitude is not None:
+            lat, lng = collector.home_latitude, collector.home_longitude
+        elif work.get('lat') is not None:
+            lat, lng = work['lat'], work['lng']
+        else:
+            lat, lng = default_lat, default_lng
+        states[collector.id] = (lat, lng, work.get('load', 0))
+    return states
+
+
+def _best_collector(distances, loads, load_penalty, max_open):
+    """Index of the cheapest collector with spare capacity, or None."""
+    if np is not None:
+        cost = np.asarray(distances) + load_penalty * loads
+        cost[loads >= max_open] = np.inf
+        best = int(np.argmin(cost))
+        return None if math.isinf(cost[best]) else best
+    
+    best, best_cost = None, math.inf
+    for index, distance in enumerate(distances):
+        if loads[index] >= max_open:
+            continue
+        cost = distance + load_penalty * loads[index]
+        if cost < best_cost:
+            best, best_cost = index, cost
+    return best
+
+
+def plan_dispatch(complaints=None, collectors=None, load_penalty=None, max_open=None):
+    """
+    Compute assignments without writing anything.
+    
+    `complaints` and `collectors` are optional querysets narrowing the
+    defaults (every dispatchable unassigned complaint, every active
+    collector). Returns {'assignments': [...], 'unassigned': [...]}.
+    """
+    load_penalty = settings.DISPATCH_LOAD_PENALTY_METERS if load_penalty is None else load_penalty
+    max_open = settings.DISPATCH_MAX_OPEN_PER_COLLECTOR if max_open is None else max_open
+    
+    if complaints is None:
+        complaints = Complaint.objects.all()
+    if collectors is None:
+        collectors = User.objects.all()
+    
+    rows = list(
+        complaints.filter(assigned_to__isnull=True, status__in=DISPATCHABLE_STATUSES)
+        .order_by('-urgency_level', 'created_at', 'id')
+        .values_list('id', 'complaint_id', 'latitude', 'longitude', 'urgency_level')
+    )
+    collectors = list(
+        collectors.filter(role='COLLECTOR', is_active=True)
+        .only('id', 'username', 'home_latitude', 'home_longitude')
+    )
+    
+    assignments, unassigned = [], []
+    located = []
+    for row in rows:
+        if row[2] is None or row[3] is None:
+            unassigned.append({'id': row[0], 'complaint_id': row[1], 'reason': 'No coordinates'})
+        else:
+            located.append(row)
+    if not collectors:
+        unassigned.extend({'id': row[0], 'complaint_id': row[1], 'reason': 'No collectors'} for row in located)
+        return {'assignments': assignments, 'unassigned': unassigned}
+    
+    states = collector_states(collectors)
+    positions = [states[collector.id][:2] for collector in collectors]
+    loads = [states[collector.id][2] for collector in collectors]
+    if np is not None:
+        loads = np.asarray(loads, dtype=float)
+    
+    for start in range(0, len(located), BLOCK_SIZE):
+        block = located[start:start + BLOCK_SIZE]
+        matrix = haversine_matrix([(row[2], row[3]) for row in block], positions)
+        for row, distances in zip(block, matrix):
+            best = _best_collector(distances, loads, load_penalty, max_open)
+            if best is None:
+                unassigned.append({'id': row[0], 'complaint_id': row[1], 'reason': 'No collector capacity'})
+                continue
+            loads[best] += 1
+            assignments.append({
+                'id': row[0],
+                'complaint_id': row[1],
+                'urgency_level': row[4],
+                'collector_id': collectors[best].id,
+                'collector_username': collectors[best].username,
+                'distance_meters': round(float(distances[best]), 1),
+            })
+    
+    return {'assignments': assignments, 'unassigned': unassigned}
+
+
+def apply_dispatch(assignments, assigned_by=None):
+    """
+    Write planned assignments in one transaction. Complaints assigned or
+    closed since planning are skipped. Returns the updated complaints.
+    """
+    collector_for = {item['id']: item['collector_id'] for item in assignments}
+    now = timezone.now()
+    
+    with transaction.atomic():
+        lock_complaints_for_update()
+        complaints = list(
+            Complaint.objects.select_for_update().filter(
+                pk__in=collector_for, assigned_to__isnull=True, status__in=DISPATCHABLE_STATUSES,
+            )
+        )
+        for complaint in complaints:
+            complaint.assigned_to_id = collector_for[complaint.pk]
+            complaint.assigned_by = assigned_by
+            complaint.status = 'ASSIGNED'
+            complaint.updated_at = now
+            restart_escalation(complaint, now)
+        Complaint.objects.bulk_update(
+            complaints, ['assigned_to', 'assigned_by', 'status', 'escalate_at', 'updated_at'], batch_size=500
+        )
+    
+    if complaints:
+        invalidate_complaint_stats()
+        publish_complaint_event('assigned', complaints)
+    return complaints
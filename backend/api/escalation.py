@@ -0,0 +1,113 @@
+"""
+Deadline-driven escalation for City Care.
+
+Every open complaint carries an `escalate_at` deadline: its urgency's
+SLA (ESCALATION_SLA_HOURS, by default 16 hours for all) counted from when
+it was created. With ESCALATION_RESTART_ON_ASSIGN, each (re)assignment
+restarts the clock. A change of urgency moves the deadline by the
+difference in SLA. Escalating is then an indexed range read of the
+complaints that are due, not a table sweep.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .events import publish_complaint_event
+from .locking import lock_complaints_for_update
+from .stats import invalidate_complaint_stats
+
+# Complaints in these statuses escalate once their deadline passes
+ESCALATABLE_STATUSES = ('PENDING', 'ASSIGNED')
+
+
+def sla_hours(urgency_level):
+    """Hours a complaint of this urgency may stay open before escalating."""
+    for min_urgency, hours in settings.ESCALATION_SLA_HOURS:
+        if urgency_level >= min_urgency:
+            return hours
+    return settings.ESCALATION_SLA_HOURS[-1][1]
+
+
+def escalation_deadline(started_at, urgency_level, force=False):
+    """When a complaint whose clock started at `started_at` becomes due; at once if forced."""
+    if force:
+        return started_at
+    return started_at + timedelta(hours=sla_hours(urgency_level))
+
+
+def rescheduled_deadline(escalate_at, old_urgency, new_urgency, force=False):
+    """`escalate_at` moved for a change of urgency, keeping when the clock started."""
+    if force:
+        return escalate_at
+    return escalate_at + timedelta(hours=sla_hours(new_urgency) - sla_hours(old_urgency))
+
+
+def restart_escalation(complaint, now=None):
+    """On (re)assignment: restart the escalation clock if ESCALATION_RESTART_ON_ASSIGN is set."""
+    if not settings.ESCALATION_RESTART_ON_ASSIGN:
+        return
+    complaint.escalate_at = escalation_deadline(
+        now or timezone.now(), complaint.urgency_level, complaint.force_escalate
+    )
+
+
+def due_complaints(now=None):
+    """Open complaints whose escalation deadline has passed."""
+    from .models import Complaint
+    
+    return Complaint.objects.filter(
+        status__in=ESCALATABLE_STATUSES, escalate_at__lte=now or timezone.now()
+    )
+
+
+def next_escalation_at():
+    """Earliest pending deadline, or None when nothing is waiting."""
+    from .models import Complaint
+    
+    return Complaint.objects.filter(
+        status__in=ESCALATABLE_STATUSES
+    ).aggregate(next=Min('escalate_at'))['next']
+
+
+def escalate(targets, limit=None, now=None):
+    """
+    Escalate the complaints in `targets` (earliest deadline first, at most
+    `limit`), publish an event and refresh the stats. Returns the event
+    summaries of the escalated complaints.
+    """
+    now = now or timezone.now()
+    
+    with transaction.atomic():
+        lock_complaints_for_update()
+        rows = targets.select_for_update().order_by('escalate_at', 'id').values(
+            'id', 'complaint_id', 'urgency_level', 'assigned_to_id', 'complainant_id'
+        )
+        escalated = [
+            {
+                'id': row['id'],
+                'complaint_id': row['complaint_id'],
+                'status': 'ESCALATED',
+                'urgency_level': row['urgency_level'],
+                'assigned_to': row['assigned_to_id'],
+                'complainant': row['complainant_id'],
+            }
+            for row in (rows[:limit] if limit else rows)
+        ]
+        if not escalated:
+            return []
+        # update() skips auto_now, so stamp updated_at for delta-sync clients
+        targets.filter(id__in=[row['id'] for row in escalated]).update(status='ESCALATED', updated_at=now)
+    
+    publish_complaint_event('escalated', escalated)
+    # Bulk update() bypasses Complaint.save, so refresh the stats here
+    invalidate_complaint_stats()
+    return escalated
+
+
+def escalate_due(batch_size=None, now=None):
+    """Escalate one bounded batch of due complaints; returns their summaries."""
+    return escalate(due_complaints(now), limit=batch_size or settings.ESCALATION_BATCH_SIZE, now=now)
@@ -0,0 +1,126 @@
+"""
+In-process event bus for live complaint updates (Server-Sent Events).
+
+Writers publish complaint state changes; each connected dashboard holds a
+bounded queue. Publishing never blocks: when a subscriber's queue is full
+its oldest event is dropped and the stream tells the client to resync.
+"""
+
+import json
+import queue
+import threading
+
+from django.db import transaction
+
+STAFF_ROLES = ('INSPECTOR', 'OFFICER')
+
+
+def complaint_summary(complaint):
+    """Small event payload for a complaint instance."""
+    return {
+        'id': complaint.id,
+        'complaint_id': complaint.complaint_id,
+        'status': complaint.status,
+        'urgency_level': complaint.urgency_level,
+        'assigned_to': complaint.assigned_to_id,
+        'complainant': complaint.complainant_id,
+    }
+
+
+class Subscriber:
+    """A connected client with its own bounded queue and visibility filter."""
+    
+    def __init__(self, user, maxsize=100):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.user_id = user.id if user.is_authenticated else None
+        self.role = getattr(user, 'role', None)
+        self.overflowed = False
+    
+    def visible(self, complaints):
+        """Subset of an event's complaints this subscriber may see."""
+        if self.role in STAFF_ROLES:
+            return complaints
+        if self.role == 'COLLECTOR':
+            return [c for c in complaints if c['assigned_to'] == self.user_id]
+        if self.user_id is not None:
+            return [c for c in complaints if c['complainant'] == self.user_id]
+        return []
+    
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # Slow consumer: drop the oldest event rather than block the writer
+            self.overflowed = True
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(message)
+            except queue.Full:
+                pass
+
+
+class EventBus:
+    """Fan-out of complaint events to every subscriber in this process."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+    
+    def subscribe(self, user, maxsize=100):
+        subscriber = Subscriber(user, maxsize)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+    
+    def publish(self, event_type, complaints):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            visible = subscriber.visible(complaints)
+            if visible:
+                subscriber.offer({'type': event_type, 'complaints': visible})
+
+
+bus = EventBus()
+
+
+def publish_complaint_event(event_type, complaints):
+    """
+    Publish an event for complaint instances or summary dicts once the
+    current transaction commits.
+    """
+    summaries = [c if isinstance(c, dict) else complaint_summary(c) for c in complaints]
+    if summaries:
+        transaction.on_commit(lambda: bus.publish(event_type, summaries))
+
+
+def format_sse(event_type, data):
+    """Encode one Server-Sent Events frame."""
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_events(subscriber, keepalive=15):
+    """
+    Generator yielding SSE frames for a subscriber until the client goes away.
+    """
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                message = subscriber.queue.get(timeout=keepalive)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            if subscriber.overflowed:
+                subscriber.overflowed = False
+                yield format_sse('resync', {})
+            yield format_sse(message['type'], message['complaints'])
+    finally:
+        bus.unsubscribe(subscriber)
@@ -0,0 +1,176 @@
+"""
+Background image processing for complaint photos.
+
+Uploads are stored as-is inside the request; once it commits, a worker
+thread downscales the photo, strips EXIF (after applying its orientation),
+re-encodes it and writes display and thumbnail renditions, which are then
+recorded on the complaint. Only JPEGs, which decode at reduced scale, are
+perceptually hashed inside the request; the worker hashes other formats.
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# Photos of the same spot whose dHashes differ by at most this many bits,
+# taken within PHOTO_DUPLICATE_RADIUS meters, count as duplicate reports
+PHOTO_HASH_MAX_DISTANCE = 6
+PHOTO_DUPLICATE_RADIUS = 150
+
+RENDITION_SIZES = {
+    'display': 1600,
+    'thumb': 320,
+}
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, 'IMAGE_PIPELINE_WORKERS', 2)
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-pipeline')
+    return _executor
+
+
+def wait_for_image_processing():
+    """Block until every queued rendition job has finished."""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _encode(image):
+    """Re-encode as WebP when Pillow supports it, else JPEG. No EXIF is written."""
+    buffer = BytesIO()
+    if features.check('webp'):
+        image.save(buffer, 'WEBP', quality=80, method=4)
+        return buffer.getvalue(), 'webp'
+    image.save(buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+    return buffer.getvalue(), 'jpg'
+
+
+def perceptual_hash(file, jpeg_only=False):
+    """
+    64-bit difference hash (dHash) of an image file as 16 hex chars.
+    JPEGs are decoded at reduced scale, so this is cheap enough to run
+    inside the request. Other formats are decoded in full; with `jpeg_only`
+    they are not decoded at all and the result is None (the rendition
+    worker hashes them instead).
+    """
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            if jpeg_only and image.format != 'JPEG':
+                return None
+            image.draft('L', (64, 64))
+            small = image.convert('L').resize((9, 8), Image.LANCZOS)
+    finally:
+        file.seek(0)
+    
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f'{bits:016x}'
+
+
+def _rendition_path(name, rendition, ext):
+    base, _ = os.path.splitext(name)
+    directory, filename = os.path.split(base)
+    return os.path.join(directory, 'renditions', f'{filename}_{rendition}.{ext}')
+
+
+def build_renditions(name, storage=default_storage):
+    """
+    Write the renditions for the stored image `name`.
+    Returns {rendition: url}.
+    """
+    with storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        image.draft('RGB', (RENDITION_SIZES['display'],) * 2)  # cheap JPEG downscale on decode
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+    
+    renditions = {}
+    for rendition, size in RENDITION_SIZES.items():
+        copy = image.copy()
+        copy.thumbnail((size, size), Image.LANCZOS)
+        data, ext = _encode(copy)
+        path = _rendition_path(name, rendition, ext)
+        if default_storage.exists(path):
+            default_storage.delete(path)  # reprocessing replaces the old copy
+        saved = default_storage.save(path, ContentFile(data))
+        renditions[rendition] = default_storage.url(saved)
+    return renditions
+
+
+def delete_renditions(name):
+    """Remove the renditions built for the stored image `name`, in either format."""
+    for rendition in RENDITION_SIZES:
+        for ext in ('webp', 'jpg'):
+            path = _rendition_path(name, rendition, ext)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+
+
+def process_complaint_image(complaint_pk, field):
+    """
+    Build renditions for one image field of a complaint and record them,
+    with the perceptual hash of a before photo the request didn't hash.
+    """
+    from .models import Complaint
+    
+    try:
+        row = Complaint.objects.filter(pk=complaint_pk).values(field, 'image_before_phash').first()
+        if not row or not row[field]:
+            return
+        name = row[field]
+        storage = Complaint._meta.get_field(field).storage
+        changes = {f'{field}_renditions': build_renditions(name, storage), 'updated_at': timezone.now()}
+        if field == 'image_before' and not row['image_before_phash']:
+            with storage.open(name, 'rb') as f:
+                changes['image_before_phash'] = perceptual_hash(f)
+        Complaint.objects.filter(pk=complaint_pk).update(**changes)
+    except Exception:
+        logger.exception('Image processing failed for complaint %s (%s)', complaint_pk, field)
+
+
+def _process_in_worker(complaint_pk, field):
+    # Worker threads hold their own DB connection; don't leak it between jobs
+    close_old_connections()
+    try:
+        process_complaint_image(complaint_pk, field)
+    finally:
+        close_old_connections()
+
+
+def schedule_image_processing(complaint, field):
+    """
+    Queue rendition generation for `complaint.<field>` once the current
+    transaction commits. Runs inline when IMAGE_PIPELINE_ASYNC is False.
+    """
+    if not getattr(complaint, field):
+        return
+    
+    def submit():
+        if getattr(settings, 'IMAGE_PIPELINE_ASYNC', True):
+            _get_executor().submit(_process_in_worker, complaint.pk, field)
+        else:
+            process_complaint_image(complaint.pk, field)
+    
+    transaction.on_commit(submit)
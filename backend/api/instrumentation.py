@@ -0,0 +1,223 @@
+"""
+Per-request performance instrumentation.
+
+RequestMetricsMiddleware times every request and records its database
+queries (through connection.execute_wrapper), response rendering and
+upload size. It reports them in a Server-Timing header (with
+SERVER_TIMING_HEADER, by default only under DEBUG), which browser dev
+tools display, and as one structured log record per request on the
+'api.requests' logger. Records are written by a background thread
+(BackgroundQueueHandler), so logging never blocks a request on I/O; the
+REQUEST_LOG setting turns them on.
+
+With REQUEST_PROFILING set, a sample of requests runs under cProfile and
+the profile of any that exceed the threshold is saved and logged.
+
+This module is loaded by the logging configuration, before the app
+registry is ready, so it must not import models.
+"""
+
+import atexit
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import queue
+import random
+import re
+import sys
+import time
+from contextlib import ExitStack
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger('api.requests')
+profile_logger = logging.getLogger('api.profiling')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters for one request; also the execute_wrapper timing its queries."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+
+def current_metrics():
+    """Metrics of the request being handled on this thread, or None."""
+    return _current.get()
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that adds its serialization time to the request metrics."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.render_seconds += time.perf_counter() - start
+
+
+class RequestMetricsMiddleware:
+    """Times each request; see the module docstring."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'SERVER_TIMING_HEADER', settings.DEBUG)
+        self.profiling = getattr(settings, 'REQUEST_PROFILING', None)
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        profiler = None
+        if self.profiling and random.random() < self.profiling.get('sample_rate', 1.0):
+            profiler = cProfile.Profile()
+
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        if self.server_timing:
+            response['Server-Timing'] = server_timing(metrics, total)
+        record_request(request, response, metrics, total)
+        if profiler is not None and total * 1000 >= self.profiling.get('threshold_ms', 500):
+            save_profile(profiler, request, total, self.profiling)
+        return response
+
+
+def server_timing(metrics, total):
+    """Server-Timing header value; view time excludes rendering."""
+    return ', '.join([
+        f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.queries} queries"',
+        f'view;dur={(total - metrics.render_seconds) * 1000:.1f}',
+        f'render;dur={metrics.render_seconds * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ])
+
+
+def _content_length(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def record_request(request, response, metrics, total):
+    user = getattr(request, 'user', None)
+    logger.info('%s %s %s', request.method, request.path, response.status_code, extra={'data': {
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'user_id': user.pk if user is not None and user.is_authenticated else None,
+        'total_ms': round(total * 1000, 2),
+        'view_ms': round((total - metrics.render_seconds) * 1000, 2),
+        'render_ms': round(metrics.render_seconds * 1000, 2),
+        'db_ms': round(metrics.db_seconds * 1000, 2),
+        'queries': metrics.queries,
+        'request_bytes': _content_length(request.META.get('CONTENT_LENGTH')),
+        'response_bytes': 0 if getattr(response, 'streaming', False) else len(response.content),
+    }})
+
+
+def save_profile(profiler, request, total, options):
+    """Write a slow request's profile to disk and log its hottest functions."""
+    directory = Path(options.get('dir') or Path(settings.BASE_DIR) / 'profiles')
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+    path = directory / f'{timezone.now():%Y%m%d-%H%M%S}-{request.method}-{slug}-{total * 1000:.0f}ms.prof'
+    profiler.dump_stats(path)
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(options.get('top', 15))
+    profile_logger.warning('Slow request %s %s took %.0f ms; profile saved to %s\n%s',
+                           request.method, request.path, total * 1000, path, summary.getvalue())
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including the record's `data` extra."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'data', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Formats records on the calling thread, then hands them to a listener
+    thread that writes them to `filename` (or stderr). When the bounded
+    queue is full, records are dropped rather than blocking the request.
+    """
+
+    def __init__(self, filename=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.filename = filename
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+
+    def _start(self):
+        if self.filename:
+            target = logging.FileHandler(self.filename, encoding='utf-8')
+        else:
+            target = logging.StreamHandler(sys.stderr)
+        self._listener = QueueListener(self.queue, target)
+        self._listener.start()
+        self._pid = os.getpid()
+        atexit.register(self.close)
+
+    def enqueue(self, record):
+        # The listener thread does not survive a fork; start one per process
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        listener, self._listener = self._listener, None
+        if listener is not None and self._pid == os.getpid():
+            listener.stop()
+        super().close()
@@ -0,0 +1,72 @@
+"""
+Transaction-scoped locks for check-then-write sequences.
+"""
+
+import zlib
+
+from django.db import connection
+
+from .utils import cells_within_radius
+
+
+def lock_location(latitude, longitude, radius_meters=50, address=None):
+    """
+    Serialize writers reporting near the same spot, or at the same address,
+    until the surrounding transaction ends. Must be called inside
+    transaction.atomic().
+    
+    - PostgreSQL: advisory locks on the grid cells covering the radius, and
+      on the case-folded address. Two reports within `radius_meters` of each
+      other always share the cell of one of them, so pass the largest
+      distance at which reports can match; only reports that could be
+      duplicates of each other wait.
+    - SQLite: takes the database write lock up front (like BEGIN IMMEDIATE);
+      SQLite has a single writer anyway, this just makes the check-then-insert
+      wait instead of failing on lock upgrade.
+    - Other backends: callers fall back to select_for_update on candidates.
+    """
+    if connection.vendor == 'postgresql':
+        names = set()
+        if latitude is not None and longitude is not None:
+            names.update(cells_within_radius(latitude, longitude, radius_meters))
+        if address:
+            # Matching compares LOWER(address); anything equal there is equal here
+            names.add(f'address:{address.lower()}')
+        # A fixed order, so two writers never wait on each other's locks
+        keys = sorted({zlib.crc32(name.encode()) for name in names})
+        with connection.cursor() as cursor:
+            for key in keys:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [key])
+    elif connection.vendor == 'sqlite':
+        lock_complaints_for_update()
+
+
+def lock_complaints_for_update():
+    """
+    For read-then-write transactions over complaints (bulk actions, dispatch,
+    escalation). Must be called inside transaction.atomic(), before reading.
+    
+    On SQLite this takes the write lock up front: two transactions that both
+    read and then try to write deadlock on the lock upgrade, and SQLite fails
+    one immediately with "database is locked" instead of waiting. Other
+    backends rely on the caller's select_for_update.
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE complaints SET id = id WHERE 0')
+
+
+def lock_media_blob(digest):
+    """
+    Serialize reference counting of one stored file (see api.storage) until
+    the surrounding transaction ends. Must be called inside transaction.atomic().
+    
+    PostgreSQL takes an advisory lock on the content hash, SQLite its write
+    lock. Other backends rely on the MediaBlob unique constraints.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [zlib.crc32(f'blob:{digest}'.encode())])
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE media_blobs SET id = id WHERE 0')
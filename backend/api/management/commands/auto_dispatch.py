@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.dispatch import apply_dispatch, plan_dispatch
+
+
+class Command(BaseCommand):
+    help = 'Assign open complaints to collectors by proximity and workload (dry run unless --apply)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apply', action='store_true', help='Write the assignments')
+        parser.add_argument('--max-open', type=int, help='Open jobs a collector may hold')
+        parser.add_argument('--load-penalty', type=float, help='Metres of extra cost per open job')
+        parser.add_argument('--show', type=int, default=20, help='Assignments to print')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        plan = plan_dispatch(load_penalty=options['load_penalty'], max_open=options['max_open'])
+        elapsed = time.perf_counter() - start
+        assignments = plan['assignments']
+        
+        for item in assignments[:options['show']]:
+            self.stdout.write(
+                f"  {item['complaint_id']} (urgency {item['urgency_level']}) -> "
+                f"{item['collector_username']} ({item['distance_meters'] / 1000:.2f} km)"
+            )
+        if len(assignments) > options['show']:
+            self.stdout.write(f'  ... {len(assignments) - options["show"]} more')
+        
+        if assignments:
+            total_km = sum(item['distance_meters'] for item in assignments) / 1000
+            self.stdout.write(
+                f'Planned {len(assignments)} assignments in {elapsed * 1000:.0f} ms '
+                f'({total_km:.1f} km total, {total_km / len(assignments):.2f} km average)'
+            )
+        else:
+            self.stdout.write(f'Nothing to assign ({elapsed * 1000:.0f} ms)')
+        if plan['unassigned']:
+            self.stdout.write(self.style.WARNING(f"{len(plan['unassigned'])} complaints left unassigned"))
+        
+        if options['apply'] and assignments:
+            updated = apply_dispatch(assignments)
+            self.stdout.write(self.style.SUCCESS(f'Assigned {len(updated)} complaints'))
+        elif assignments:
+            self.stdout.write('Dry run; pass --apply to write the assignments')
@@ -0,0 +1,49 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from api import utils
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark of the batch haversine API against the scalar function'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=10000, help='Number of candidate points')
+        parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        n = options['points']
+        repeat = options['repeat']
+        
+        # Points scattered around Coimbatore
+        points = [(11.0 + rng.uniform(-0.1, 0.1), 76.96 + rng.uniform(-0.1, 0.1)) for _ in range(n)]
+        origin = (11.0168, 76.9558)
+        
+        def scalar():
+            return [utils.haversine_distance(origin[0], origin[1], lat, lng) for lat, lng in points]
+        
+        def batch():
+            return utils.haversine_many(origin[0], origin[1], points)
+        
+        backend = 'numpy' if utils.np is not None else 'pure-python'
+        self.stdout.write(f'Distances from 1 point to {n} points (batch backend: {backend})')
+        
+        scalar_time = min(timeit.repeat(scalar, number=1, repeat=repeat))
+        batch_time = min(timeit.repeat(batch, number=1, repeat=repeat))
+        self.stdout.write(f'  scalar loop : {scalar_time * 1000:8.2f} ms')
+        self.stdout.write(f'  batch       : {batch_time * 1000:8.2f} ms  ({scalar_time / batch_time:.1f}x)')
+        
+        side = min(n, 1000)
+        matrix_time = min(timeit.repeat(lambda: utils.haversine_matrix(points[:side], points[:side]), number=1, repeat=repeat))
+        self.stdout.write(f'  {side}x{side} matrix: {matrix_time * 1000:8.2f} ms')
+        
+        nearest_time = min(timeit.repeat(lambda: utils.nearest_k(origin[0], origin[1], points, 10), number=1, repeat=repeat))
+        radius_time = min(timeit.repeat(lambda: utils.within_radius(origin[0], origin[1], points, 500), number=1, repeat=repeat))
+        self.stdout.write(f'  nearest_k(10): {nearest_time * 1000:8.2f} ms')
+        self.stdout.write(f'  within_radius: {radius_time * 1000:8.2f} ms')
+        
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
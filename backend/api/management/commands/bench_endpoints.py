@@ -0,0 +1,406 @@
+import io
+import itertools
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.imaging import wait_for_image_processing
+from api.models import Complaint, User
+
+# Complaints and users created by the benchmark; removed again afterwards
+# when it runs --in-place
+BENCH_ADDRESS = 'Benchmark complaint'
+BENCH_PREFIX = 'bench_'
+STAFF_POOL = 8  # action throttles are per user, so spread actions over several
+
+# Per-scenario budgets: p95 latency in ms and queries per request.
+# Latency budgets are deliberately loose; query counts are exact contracts.
+DEFAULT_BUDGETS = {
+    'users list': {'p95_ms': 500, 'queries': 3},
+    'collectors': {'p95_ms': 200, 'queries': 3},
+    'me': {'p95_ms': 50, 'queries': 2},
+    'login': {'p95_ms': 1500, 'queries': 6},
+    'complaint list': {'p95_ms': 250, 'queries': 5},
+    'complaint list lean': {'p95_ms': 200, 'queries': 5},
+    'complaint list page 2': {'p95_ms': 250, 'queries': 5},
+    'complaint list by status': {'p95_ms': 250, 'queries': 5},
+    'complaint list by collector': {'p95_ms': 250, 'queries': 5},
+    'complaint list bbox': {'p95_ms': 300, 'queries': 5},
+    'complaint detail': {'p95_ms': 50, 'queries': 4},
+    'complaint detail not modified': {'p95_ms': 50, 'queries': 3},
+    'delta sync': {'p95_ms': 500, 'queries': 4},
+    'create': {'p95_ms': 300, 'queries': 12},
+    'create duplicate': {'p95_ms': 250, 'queries': 6},
+    'assign': {'p95_ms': 100, 'queries': 8},
+    'resolve': {'p95_ms': 100, 'queries': 7},
+    'reject': {'p95_ms': 100, 'queries': 7},
+    'bulk assign': {'p95_ms': 250, 'queries': 8},
+    'bulk resolve': {'p95_ms': 250, 'queries': 7},
+    'bulk reject': {'p95_ms': 250, 'queries': 7},
+    'simulate timeout': {'p95_ms': 100, 'queries': 7},
+    'stats': {'p95_ms': 50, 'queries': 2},
+    'stats by collector': {'p95_ms': 50, 'queries': 2},
+    'dispatch dry run': {'p95_ms': 200, 'queries': 5},
+    'collector route': {'p95_ms': 200, 'queries': 4},
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Scenario:
+    """
+    One route under test. `path` and `data` are values or callables of the
+    benchmark and a call number, evaluated outside the timed region.
+    """
+
+    def __init__(self, name, method, path, data=None, staff=True, expect=(200,), json_body=True, headers=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.staff = staff
+        self.expect = expect
+        self.json_body = json_body
+        self.headers = headers or {}
+
+    def build(self, bench, n):
+        path = self.path(bench, n) if callable(self.path) else self.path
+        data = self.data(bench, n) if callable(self.data) else self.data
+        headers = self.headers(bench, n) if callable(self.headers) else self.headers
+        return path, data, headers
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks every API route in-process against a throwaway copy of the current database: '
+            'latency percentiles, queries and allocations per request, failing when a budget is exceeded')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per scenario')
+        parser.add_argument('--threads', type=int, default=1,
+                            help='Run every scenario from this many threads at once to expose lock contention')
+        parser.add_argument('--only', nargs='*', help='Scenario names (substring match) to run')
+        parser.add_argument('--budgets', help='JSON file of {scenario: {"p95_ms": ..., "queries": ...}} overrides')
+        parser.add_argument('--no-budgets', action='store_true', help='Report only; never fail')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--in-place', action='store_true',
+                            help='Run against the configured database itself (required unless it is SQLite); '
+                                 'leaves tombstones and used complaint IDs behind')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        budgets = dict(DEFAULT_BUDGETS)
+        if options['budgets']:
+            with open(options['budgets']) as f:
+                budgets.update(json.load(f))
+
+        scenarios = self.scenarios()
+        if options['only']:
+            scenarios = [s for s in scenarios if any(term in s.name for term in options['only'])]
+
+        threads = max(options['threads'], 1)
+        if options['in_place']:
+            self.run(scenarios, options, budgets, threads)
+            return
+        if connection.vendor != 'sqlite':
+            raise CommandError('Only an SQLite database can be copied; use --in-place on a disposable database')
+        with self.throwaway_database():
+            self.run(scenarios, options, budgets, threads)
+
+    def run(self, scenarios, options, budgets, threads):
+        # One target complaint per request, plus the untimed allocation request
+        self.setup((options['warmup'] + options['iterations']) * threads + 1)
+        try:
+            results = {}
+            for scenario in scenarios:
+                results[scenario.name] = self.run_scenario(scenario, options['iterations'], options['warmup'], threads)
+            self.report(results, budgets, threads, options['no_budgets'])
+        finally:
+            self.teardown()
+
+    @contextmanager
+    def throwaway_database(self):
+        """
+        Point every connection at a copy of the SQLite database, and uploads
+        at a scratch MEDIA_ROOT, both removed afterwards.
+        """
+        original = connection.settings_dict['NAME']
+        with tempfile.TemporaryDirectory(prefix='bench-') as directory:
+            copy = os.path.join(directory, 'db.sqlite3')
+            connection.ensure_connection()
+            target = sqlite3.connect(copy)
+            try:
+                connection.connection.backup(target)
+            finally:
+                target.close()
+            connection.close()
+            # Shared by every thread's connection, so worker threads use the copy too
+            connection.settings_dict['NAME'] = copy
+            try:
+                with override_settings(MEDIA_ROOT=os.path.join(directory, 'media')):
+                    yield
+            finally:
+                wait_for_image_processing()
+                connection.close()
+                connection.settings_dict['NAME'] = original
+
+    # Fixtures
+
+    def setup(self, targets):
+        """Users, target complaints and cursors the scenarios need."""
+        password = make_password('bench')
+        staff = []
+        for i in range(STAFF_POOL):
+            user, _ = User.objects.get_or_create(
+                username=f'{BENCH_PREFIX}inspector_{i}', defaults={'role': 'INSPECTOR', 'password': password}
+            )
+            staff.append(user)
+        self.staff = staff
+        self.login_user, _ = User.objects.get_or_create(
+            username=f'{BENCH_PREFIX}citizen', defaults={'role': 'CITIZEN'}
+        )
+        self.login_user.set_password('bench')
+        self.login_user.save()
+        self.collector, _ = User.objects.get_or_create(
+            username=f'{BENCH_PREFIX}collector', defaults={'role': 'COLLECTOR', 'password': password}
+        )
+
+        # Fresh complaints for every mutating request: assign, resolve, reject, bulk, timeout
+        self.targets = defaultdict(list)
+        for pool in ('assign', 'resolve', 'reject', 'timeout', 'dispatch'):
+            for _ in range(targets):
+                self.targets[pool].append(self.make_complaint().pk)
+        self.bulk_targets = {action: [self.make_complaint().pk for _ in range(50)]
+                             for action in ('assign', 'resolve', 'reject')}
+        for _ in range(10):
+            self.make_complaint(assigned_to=self.collector, status='ASSIGNED')
+        self.duplicate_of = self.make_complaint()
+
+        client = self.client_for(staff[0])
+        first_page = client.get('/api/complaints/').json()
+        self.next_page = first_page.get('next')
+        self.sample = first_page['results'][0]['id'] if first_page['results'] else self.duplicate_of.pk
+        self.sample_etag = client.get(f'/api/complaints/{self.sample}/').headers.get('ETag', '')
+        self.watermark = client.get('/api/complaints/changes/').json()['watermark']
+
+    def make_complaint(self, **fields):
+        lat = settings.DISPATCH_DEFAULT_CENTER[0] + self.rng.uniform(-0.05, 0.05)
+        lng = settings.DISPATCH_DEFAULT_CENTER[1] + self.rng.uniform(-0.05, 0.05)
+        return Complaint.objects.create(
+            location_coords=f'{lat:.6f},{lng:.6f}', location_address=BENCH_ADDRESS, **fields
+        )
+
+    def teardown(self):
+        # Renditions still being built would be written after their photo is gone
+        wait_for_image_processing()
+        # Deleting sends post_delete per row, which releases each photo's blob
+        # reference and removes the file and its renditions with the last one
+        Complaint.objects.filter(location_address__startswith=BENCH_ADDRESS).delete()
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+
+    def client_for(self, user=None):
+        client = Client(raise_request_exception=False)
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def take(self, pool):
+        with self.lock:
+            return self.targets[pool].pop()
+
+    def next_ip(self):
+        """A fresh client address, so per-IP throttles measure, not reject."""
+        n = next(self.counter)
+        return f'10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}'
+
+    def photo(self):
+        from PIL import Image
+
+        with self.lock:
+            pixels = bytes(self.rng.randrange(256) for _ in range(32 * 32 * 3))
+        buffer = io.BytesIO()
+        Image.frombytes('RGB', (32, 32), pixels).resize((256, 256)).save(buffer, 'JPEG')
+        return SimpleUploadedFile('bench.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def new_report(self):
+        # Unique address and scattered position, so it is not a duplicate of another report
+        with self.lock:
+            lat = 10.5 + self.rng.uniform(-0.3, 0.3)
+            lng = 76.5 + self.rng.uniform(-0.3, 0.3)
+        return {
+            'location_coords': f'{lat:.6f},{lng:.6f}',
+            'location_address': f'{BENCH_ADDRESS} {next(self.counter)}',
+            'description': 'Benchmark report',
+            'image_before': self.photo(),
+        }
+
+    def scenarios(self):
+        return [
+            Scenario('users list', 'get', '/api/users/'),
+            Scenario('collectors', 'get', '/api/users/collectors/'),
+            Scenario('me', 'get', '/api/users/me/'),
+            Scenario('login', 'post', '/api/login/', staff=False,
+                     data=lambda b, n: {'username': b.login_user.username, 'password': 'bench', 'role': 'CITIZEN'}),
+            Scenario('complaint list', 'get', '/api/complaints/'),
+            Scenario('complaint list lean', 'get', '/api/complaints/?lean=1'),
+            Scenario('complaint list page 2', 'get', lambda b, n: b.next_page or '/api/complaints/'),
+            Scenario('complaint list by status', 'get', '/api/complaints/?status=PENDING'),
+            Scenario('complaint list by collector', 'get', lambda b, n: f'/api/complaints/?assigned_to={b.collector.pk}'),
+            Scenario('complaint list bbox', 'get', '/api/complaints/?bbox=10.99,76.94,11.03,76.98'),
+            Scenario('complaint detail', 'get', lambda b, n: f'/api/complaints/{b.sample}/'),
+            Scenario('complaint detail not modified', 'get', lambda b, n: f'/api/complaints/{b.sample}/',
+                     expect=(304,), headers=lambda b, n: {'If-None-Match': b.sample_etag}),
+            Scenario('delta sync', 'get', lambda b, n: f'/api/complaints/changes/?since={b.watermark}'),
+            Scenario('create', 'post', '/api/complaints/', staff=False, json_body=False,
+                     expect=(201,), data=lambda b, n: b.new_report()),
+            Scenario('create duplicate', 'post', '/api/complaints/', staff=False, json_body=False,
+                     data=lambda b, n: {'location_coords': b.duplicate_of.location_coords,
+                                        'location_address': BENCH_ADDRESS, 'description': 'Benchmark duplicate'}),
+            Scenario('assign', 'post', lambda b, n: f"/api/complaints/{b.take('assign')}/assign/",
+                     data=lambda b, n: {'collector_id': b.collector.pk}),
+            Scenario('resolve', 'post', lambda b, n: f"/api/complaints/{b.take('resolve')}/resolve/", json_body=False),
+            Scenario('reject', 'post', lambda b, n: f"/api/complaints/{b.take('reject')}/reject/",
+                     data={'reason': 'Benchmark'}),
+            Scenario('bulk assign', 'post', '/api/complaints/bulk/assign/',
+                     data=lambda b, n: {'ids': b.bulk_targets['assign'], 'collector_id': b.collector.pk}),
+            Scenario('bulk resolve', 'post', '/api/complaints/bulk/resolve/',
+                     data=lambda b, n: {'ids': b.bulk_targets['resolve']}),
+            Scenario('bulk reject', 'post', '/api/complaints/bulk/reject/',
+                     data=lambda b, n: {'ids': b.bulk_targets['reject'], 'reason': 'Benchmark'}),
+            Scenario('simulate timeout', 'post', '/api/simulate-timeout/',
+                     data=lambda b, n: {'complaint_ids': [b.take('timeout')]}),
+            Scenario('stats', 'get', '/api/stats/'),
+            Scenario('stats by collector', 'get', '/api/stats/?breakdown=collector'),
+            Scenario('dispatch dry run', 'post', '/api/dispatch/',
+                     data=lambda b, n: {'complaint_ids': b.targets['dispatch'][:200]}),
+            Scenario('collector route', 'get', lambda b, n: f'/api/users/{b.collector.pk}/route/'),
+        ]
+
+    # Measurement
+
+    def request(self, client, scenario, n):
+        """One request: (seconds, queries, status)."""
+        path, data, headers = scenario.build(self, n)
+        kwargs = {'REMOTE_ADDR': self.next_ip(), 'headers': headers}
+        if data is not None:
+            kwargs['data'] = data
+            if scenario.json_body:
+                kwargs['content_type'] = 'application/json'
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(client, scenario.method)(path, **kwargs)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries), response.status_code
+
+    def run_scenario(self, scenario, iterations, warmup, threads):
+        samples = []
+        statuses = defaultdict(int)
+        barrier = threading.Barrier(threads)
+
+        def worker(thread_index):
+            try:
+                client = self.client_for(self.staff[thread_index % STAFF_POOL] if scenario.staff else None)
+                local = []
+                barrier.wait()
+                for n in range(warmup + iterations):
+                    try:
+                        result = self.request(client, scenario, n)
+                    except Exception as e:  # e.g. "database is locked" raised outside the view
+                        with self.lock:
+                            statuses[type(e).__name__] += 1
+                        continue
+                    if n >= warmup:
+                        local.append(result)
+                with self.lock:
+                    samples.extend(local)
+                    for _, _, status_code in local:
+                        statuses[status_code] += 1
+            finally:
+                if threads > 1:
+                    close_old_connections()
+
+        started = time.perf_counter()
+        if threads == 1:
+            worker(0)
+        else:
+            pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+        wall = time.perf_counter() - started
+
+        # Allocations in a separate, untimed request: tracemalloc slows everything down
+        allocated_kb = None
+        if threads == 1:
+            client = self.client_for(self.staff[0] if scenario.staff else None)
+            tracemalloc.start()
+            try:
+                self.request(client, scenario, warmup + iterations)
+                allocated_kb = tracemalloc.get_traced_memory()[1] / 1024
+            finally:
+                tracemalloc.stop()
+
+        return {'samples': samples, 'statuses': dict(statuses), 'wall': wall, 'allocated_kb': allocated_kb,
+                'expect': scenario.expect}
+
+    def report(self, results, budgets, threads, no_budgets):
+        self.stdout.write(
+            f"{'scenario':<30} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak KB':>8} "
+            f"{'req/s':>8}  status"
+        )
+        failures = []
+        for name, result in results.items():
+            samples = result['samples']
+            errors = {status: count for status, count in result['statuses'].items() if status not in result['expect']}
+            if not samples:
+                self.stdout.write(f'{name:<30} no successful requests  {result["statuses"]}')
+                failures.append(f'{name}: no successful requests')
+                continue
+
+            latencies = [sample[0] * 1000 for sample in samples]
+            queries = max(sample[1] for sample in samples)
+            p50, p95, p99 = (percentile(latencies, q) for q in (0.5, 0.95, 0.99))
+            allocated = f"{result['allocated_kb']:8.0f}" if result['allocated_kb'] is not None else f"{'-':>8}"
+            statuses = ' '.join(f'{status}x{count}' for status, count in sorted(result['statuses'].items(), key=str))
+            self.stdout.write(
+                f'{name:<30} {p50:8.1f} {p95:8.1f} {p99:8.1f} {queries:8d} {allocated} '
+                f"{len(samples) / result['wall']:8.0f}  {statuses}"
+            )
+
+            if errors:
+                failures.append(f'{name}: unexpected responses {errors}')
+            budget = budgets.get(name)
+            if budget and not no_budgets:
+                # Contention makes latency meaningless to budget in threaded runs
+                if threads == 1 and 'p95_ms' in budget and p95 > budget['p95_ms']:
+                    failures.append(f"{name}: p95 {p95:.1f} ms > {budget['p95_ms']} ms")
+                if 'queries' in budget and queries > budget['queries']:
+                    failures.append(f"{name}: {queries} queries > {budget['queries']}")
+
+        if failures:
+            raise CommandError('Benchmark budgets exceeded:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All scenarios within budget'))
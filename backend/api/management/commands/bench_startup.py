@@ -0,0 +1,47 @@
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# What a worker does before serving its first request
+COLD_START = (
+    'import citycare.wsgi\n'
+    'from django.urls import get_resolver\n'
+    'get_resolver().url_patterns\n'
+)
+
+
+class Command(BaseCommand):
+    help = 'Times cold process start-up: loading the WSGI app and URLconf, and a no-op manage.py command'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh processes per measurement')
+
+    def time_process(self, args, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, *args], cwd=settings.BASE_DIR, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def handle(self, *args, **options):
+        runs = options['runs']
+        measurements = {
+            'worker cold start': ['-c', COLD_START],
+            'manage.py version': ['manage.py', 'version'],
+            'manage.py check': ['manage.py', 'check'],
+        }
+        
+        self.stdout.write(f'Best / median of {runs} fresh processes')
+        for name, args in measurements.items():
+            timings = self.time_process(args, runs)
+            self.stdout.write(
+                f'  {name:<20} {min(timings) * 1000:8.1f} ms  {statistics.median(timings) * 1000:8.1f} ms'
+            )
+        
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.imaging import process_complaint_image
+from api.models import Complaint
+
+
+class Command(BaseCommand):
+    help = 'Builds missing display/thumbnail renditions for complaint photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild renditions that already exist')
+
+    def handle(self, *args, **options):
+        processed = 0
+        for field in ('image_before', 'image_after'):
+            complaints = Complaint.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            if not options['all']:
+                complaints = complaints.filter(**{f'{field}_renditions': {}})
+            for pk in complaints.values_list('pk', flat=True).iterator():
+                process_complaint_image(pk, field)
+                processed += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} images'))
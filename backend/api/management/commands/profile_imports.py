@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from .bench_startup import COLD_START
+
+PROJECT_PACKAGES = ('api', 'citycare')
+
+
+class Command(BaseCommand):
+    help = 'Reports module import times of a cold worker start (python -X importtime)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Modules to list')
+        parser.add_argument('--all', action='store_true',
+                            help='Include third-party and stdlib modules, not just the project')
+
+    def import_times(self):
+        """(module, self us, cumulative us) for every import of a cold start."""
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', COLD_START],
+            cwd=settings.BASE_DIR, check=True, capture_output=True, text=True,
+        )
+        rows = []
+        for line in result.stderr.splitlines():
+            # "import time:       self [us] |  cumulative | imported package"
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, module = line[len('import time:'):].split('|')
+            rows.append((module.strip(), int(self_us), int(cumulative_us)))
+        return rows
+
+    def handle(self, *args, **options):
+        rows = self.import_times()
+        total_us = sum(self_us for _, self_us, _ in rows)
+        total_modules = len(rows)
+        
+        if not options['all']:
+            rows = [row for row in rows if row[0].split('.')[0] in PROJECT_PACKAGES]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>8}  module")
+        for module, self_us, cumulative_us in rows[:options['top']]:
+            self.stdout.write(f'{cumulative_us / 1000:14.1f} {self_us / 1000:8.1f}  {module}')
+        
+        self.stdout.write(f'Total import time: {total_us / 1000:.1f} ms across {total_modules} modules')
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Deletes complaint tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS (run daily)'
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {deleted} tombstones older than {settings.SYNC_TOMBSTONE_RETENTION_DAYS} days'
+        ))
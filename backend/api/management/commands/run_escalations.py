@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.escalation import escalate_due, next_escalation_at
+
+
+class Command(BaseCommand):
+    help = 'Escalate complaints as their deadlines pass (runs until interrupted unless --once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Escalate everything due now and exit')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Longest sleep between checks, in seconds')
+        parser.add_argument('--batch-size', type=int, default=settings.ESCALATION_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        interval = options['interval']
+        
+        try:
+            while True:
+                close_old_connections()
+                escalated = 0
+                while True:
+                    batch = escalate_due(batch_size)
+                    escalated += len(batch)
+                    if len(batch) < batch_size:
+                        break
+                if escalated:
+                    self.stdout.write(f'{timezone.now():%Y-%m-%d %H:%M:%S} escalated {escalated}')
+                
+                if options['once']:
+                    break
+                
+                # Sleep until the next deadline, but wake at least every interval
+                # so complaints created meanwhile with earlier deadlines are not missed
+                next_at = next_escalation_at()
+                delay = interval
+                if next_at is not None:
+                    delay = min(interval, max((next_at - timezone.now()).total_seconds(), 0.0))
+                time.sleep(delay)
+        except KeyboardInterrupt:
+            pass
+        
+        self.stdout.write(self.style.SUCCESS('Escalation scheduler stopped'))
@@ -0,0 +1,277 @@
+import operator
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.escalation import escalation_deadline
+from api.models import Complaint, ComplaintSequence, ComplaintTombstone, User
+from api.stats import invalidate_complaint_stats
+from api.utils import grid_cell
+
+# Coimbatore wards / localities: (name, lat, lng, relative complaint volume)
+WARDS = [
+    ('Gandhipuram', 11.0168, 76.9674, 10),
+    ('RS Puram', 11.0089, 76.9497, 8),
+    ('Town Hall', 10.9946, 76.9614, 9),
+    ('Ukkadam', 10.9925, 76.9614, 7),
+    ('Peelamedu', 11.0269, 77.0090, 8),
+    ('Saibaba Colony', 11.0252, 76.9419, 6),
+    ('Singanallur', 10.9994, 77.0322, 6),
+    ('Ramanathapuram', 10.9990, 76.9969, 5),
+    ('Race Course', 11.0000, 76.9750, 3),
+    ('Ganapathy', 11.0406, 76.9797, 6),
+    ('Saravanampatti', 11.0795, 76.9977, 5),
+    ('Kuniyamuthur', 10.9634, 76.9530, 4),
+    ('Vadavalli', 11.0254, 76.9036, 4),
+    ('Podanur', 10.9650, 76.9790, 4),
+    ('Kavundampalayam', 11.0479, 76.9491, 4),
+    ('Thudiyalur', 11.0785, 76.9400, 3),
+]
+
+# Spread of ordinary reports around a ward centre, and around a dump hotspot (degrees)
+WARD_SPREAD = 0.006
+HOTSPOT_SPREAD = 0.0004
+HOTSPOTS_PER_WARD = 6
+HOTSPOT_SHARE = 0.25
+
+URGENCY_WEIGHTS = [55, 20, 12, 7, 4, 1, 0.5, 0.3, 0.1, 0.1]  # urgency 1..10
+
+# Status mix by complaint age: (max age in days, weights for STATUSES)
+STATUSES = ['PENDING', 'ASSIGNED', 'RESOLVED', 'REJECTED', 'ESCALATED']
+STATUS_MIX = [
+    (2, [45, 35, 15, 3, 2]),
+    (7, [10, 25, 50, 5, 10]),
+    (None, [2, 5, 78, 7, 8]),
+]
+
+REJECT_REASONS = ['Duplicate report', 'Not a municipal area', 'Insufficient details', 'Already cleared']
+
+# Hours of the day complaints come in, weighted towards daytime
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 7, 9, 9, 8, 8, 7, 7, 7, 7, 8, 9, 9, 7, 5, 3, 2, 1]
+
+
+def cumulative(weights):
+    """Running totals, for rng.choices(cum_weights=...) without recomputing them per call."""
+    totals, running = [], 0
+    for weight in weights:
+        running += weight
+        totals.append(running)
+    return totals
+
+
+class Command(BaseCommand):
+    help = 'Generates a large, reproducible synthetic dataset (users and complaints) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--complaints', type=int, default=100000)
+        parser.add_argument('--citizens', type=int, default=2000)
+        parser.add_argument('--collectors', type=int, default=120)
+        parser.add_argument('--months', type=int, default=6, help='Span of complaint timestamps, ending today')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed; the same seed gives the same data relative to today')
+        parser.add_argument('--chunk-size', type=int, default=20000, help='Rows per insert transaction')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously generated load-test users and complaints first')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+
+        if options['clear']:
+            self.clear()
+
+        if connection.vendor == 'sqlite':
+            # Bulk load: skip fsync per transaction; the data is synthetic anyway
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = OFF')
+
+        citizens, collectors_by_ward = self.create_users(rng, options['citizens'], options['collectors'], options['seed'])
+        hotspots = [
+            [(lat + rng.gauss(0, WARD_SPREAD), lng + rng.gauss(0, WARD_SPREAD)) for _ in range(HOTSPOTS_PER_WARD)]
+            for _, lat, lng, _ in WARDS
+        ]
+
+        total = options['complaints']
+        days = max(options['months'] * 30, 1)
+        today = timezone.localdate()
+        # Daily volume: weekday bump and gentle growth towards today
+        day_weights = [
+            (1.15 if (today - timedelta(days=age)).weekday() in (0, 1) else 1.0) * (1.0 + 0.5 * (days - age) / days)
+            for age in range(days)
+        ]
+        scale = total / sum(day_weights)
+
+        insert = self.complaint_inserter()
+        created = 0
+        buffer = []
+        for age in range(days - 1, -1, -1):
+            remaining = total - created - len(buffer)
+            count = min(round(day_weights[age] * scale), remaining) if age else remaining
+            if count <= 0:
+                continue
+            day = today - timedelta(days=age)
+            complaint_ids = ComplaintSequence.reserve_complaint_ids(day, count)
+            buffer.extend(self.make_complaints(rng, complaint_ids, day, age, citizens, collectors_by_ward, hotspots))
+
+            if len(buffer) >= options['chunk_size']:
+                created += insert(buffer)
+                buffer = []
+                self.stdout.write(f'  {created}/{total} complaints ({time.perf_counter() - started:.1f}s)')
+        created += insert(buffer)
+
+        invalidate_complaint_stats()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(citizens)} citizens, {sum(map(len, collectors_by_ward))} collectors and '
+            f'{created} complaints in {elapsed:.1f}s ({created / max(elapsed, 1e-9):.0f} complaints/s)'
+        ))
+
+    def clear(self):
+        synthetic_users = User.objects.filter(username__startswith='load_')
+        generated = Complaint.objects.filter(complainant__in=synthetic_users)
+        # Plain SQL rather than QuerySet.delete(), which would load every row to
+        # send post_delete. Generated complaints have no images to release, so
+        # writing their tombstones is the only bookkeeping needed.
+        select_sql, params = generated.values('id', 'complaint_id').query.sql_with_params()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {ComplaintTombstone._meta.db_table} (complaint_pk, complaint_id, deleted_at) '
+                f'SELECT id, complaint_id, %s FROM ({select_sql}) AS generated',
+                [connection.ops.adapt_datetimefield_value(timezone.now()), *params],
+            )
+            cursor.execute(
+                f'DELETE FROM {Complaint._meta.db_table} WHERE id IN (SELECT id FROM ({select_sql}) AS generated)',
+                params,
+            )
+            deleted = cursor.rowcount
+        users, _ = synthetic_users.delete()
+        self.stdout.write(f'Cleared {deleted} generated complaints and {users} rows of generated users')
+
+    def create_users(self, rng, citizen_count, collector_count, seed):
+        """Bulk-create the users; returns [(id, name)] citizens and collector ids per ward."""
+        # One shared hash: hashing a password per user would take minutes
+        password = make_password('loadtest')
+        prefix = f'load_{seed}'
+
+        users = [
+            User(username=f'{prefix}_citizen_{i}', role='CITIZEN', password=password, first_name=f'Citizen {i}')
+            for i in range(citizen_count)
+        ]
+        for i in range(collector_count):
+            _, lat, lng, _ = WARDS[i % len(WARDS)]
+            users.append(User(
+                username=f'{prefix}_collector_{i}', role='COLLECTOR', password=password,
+                first_name=f'Collector {i}',
+                home_latitude=lat + rng.gauss(0, WARD_SPREAD / 2),
+                home_longitude=lng + rng.gauss(0, WARD_SPREAD / 2),
+            ))
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=1000, ignore_conflicts=True)
+
+        # Re-read ids: bulk_create does not return them on every backend, nor for re-runs
+        ids = dict(User.objects.filter(username__startswith=f'{prefix}_').values_list('username', 'id'))
+        citizens = [(ids[f'{prefix}_citizen_{i}'], f'Citizen {i}') for i in range(citizen_count)]
+        collectors_by_ward = [[] for _ in WARDS]
+        for i in range(collector_count):
+            collectors_by_ward[i % len(WARDS)].append(ids[f'{prefix}_collector_{i}'])
+        return citizens, collectors_by_ward
+
+    def make_complaints(self, rng, complaint_ids, day, age, citizens, collectors_by_ward, hotspots):
+        """Yield one column dict per complaint created on `day`."""
+        ward_weights = cumulative([ward[3] for ward in WARDS])
+        hour_weights = cumulative(HOUR_WEIGHTS)
+        urgency_weights = cumulative(URGENCY_WEIGHTS)
+        status_weights = cumulative(next(weights for max_age, weights in STATUS_MIX if max_age is None or age <= max_age))
+        midnight = timezone.make_aware(datetime.combine(day, dt_time()))
+        now = timezone.now()
+
+        for complaint_id in complaint_ids:
+            ward_index = rng.choices(range(len(WARDS)), cum_weights=ward_weights)[0]
+            ward, lat, lng, _ = WARDS[ward_index]
+            if rng.random() < HOTSPOT_SHARE:
+                lat, lng = rng.choice(hotspots[ward_index])
+                spread = HOTSPOT_SPREAD
+            else:
+                spread = WARD_SPREAD
+            lat, lng = round(lat + rng.gauss(0, spread), 6), round(lng + rng.gauss(0, spread), 6)
+
+            hour = rng.choices(range(24), cum_weights=hour_weights)[0]
+            created_at = midnight + timedelta(hours=hour, seconds=rng.randrange(3600))
+            if created_at > now:
+                # Today's complaints must not be in the future
+                created_at = midnight + (now - midnight) * rng.random()
+            status = rng.choices(STATUSES, cum_weights=status_weights)[0]
+            urgency_level = rng.choices(range(1, 11), cum_weights=urgency_weights)[0]
+            complainant_id, complainant_name = rng.choice(citizens) if citizens else (None, '')
+
+            collectors = collectors_by_ward[ward_index]
+            assigned_to_id = None
+            if collectors and (status in ('ASSIGNED', 'RESOLVED') or (status == 'ESCALATED' and rng.random() < 0.5)):
+                assigned_to_id = rng.choice(collectors)
+
+            updated_at = created_at
+            if status != 'PENDING':
+                updated_at = min(created_at + timedelta(hours=rng.uniform(0.5, 72)), now)
+
+            yield {
+                'complaint_id': complaint_id,
+                'complainant_id': complainant_id,
+                'complainant_name': complainant_name,
+                'location_coords': f'{lat},{lng}',
+                'latitude': lat,
+                'longitude': lng,
+                'grid_cell': grid_cell(lat, lng),
+                'location_address': f'{rng.randint(1, 250)}, {ward}, Coimbatore',
+                'status': status,
+                'urgency_level': urgency_level,
+                'assigned_to_id': assigned_to_id,
+                'rejected_reason': rng.choice(REJECT_REASONS) if status == 'REJECTED' else None,
+                'escalate_at': escalation_deadline(created_at, urgency_level),
+                'created_at': created_at,
+                'updated_at': updated_at,
+            }
+
+    def complaint_inserter(self):
+        """
+        A function inserting column dicts into the complaints table, one
+        transaction per call.
+        
+        Rows go through cursor.executemany() instead of bulk_create():
+        bulk_create runs pre_save/get_db_prep_save for every field of every
+        instance, which caps it at a few thousand rows a second. Columns not
+        generated here take the value a fresh Complaint() would save.
+        """
+        template = Complaint()
+        fields = [field for field in Complaint._meta.concrete_fields if not field.primary_key]
+        defaults = {
+            field.attname: field.get_db_prep_save(field.pre_save(template, True), connection)
+            for field in fields
+        }
+        datetime_columns = ('created_at', 'updated_at', 'escalate_at')
+        adapt = connection.ops.adapt_datetimefield_value
+
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(Complaint._meta.db_table),
+            ', '.join(connection.ops.quote_name(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        row_values = operator.itemgetter(*(field.attname for field in fields))
+
+        def insert(rows):
+            if not rows:
+                return 0
+            params = []
+            for row in rows:
+                for column in datetime_columns:
+                    row[column] = adapt(row[column])
+                params.append(row_values({**defaults, **row}))
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+            return len(rows)
+
+        return insert
@@ -0,0 +1,138 @@
+"""
+Media file serving for complaint photos.
+
+Replaces django.conf.urls.static: adds validators (ETag/Last-Modified),
+long-lived immutable caching for content-addressed files, single-range
+requests, and optional hand-off of the transfer to the web server via
+X-Sendfile / X-Accel-Redirect.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+# Content-addressed names embed the SHA-256 of the bytes, so they never change
+CAS_NAME_RE = re.compile(r'(?:^|/)cas/.*/([0-9a-f]{64})\.[^/]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+DEFAULT_MAX_AGE = 3600
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """
+    Parse a single "bytes=a-b" range into (start, end) inclusive.
+    Returns None when there is no usable range, or 'unsatisfiable'.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(path, name, response):
+    """Let the front-end web server send the file, if configured."""
+    backend = getattr(settings, 'MEDIA_SENDFILE_BACKEND', None)
+    if backend == 'x-sendfile':
+        response['X-Sendfile'] = path
+    elif backend == 'x-accel-redirect':
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix + quote(name)
+    else:
+        return False
+    return True
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(full_path)
+    except (OSError, ValueError, SuspiciousFileOperation) as e:
+        raise Http404('Media file not found') from e
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('Media file not found')
+    
+    size = st.st_size
+    cas_match = CAS_NAME_RE.search(path)
+    if cas_match:
+        etag = quote_etag(cas_match.group(1))
+        cache_control = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        etag = quote_etag(f'{st.st_mtime_ns:x}-{size:x}')
+        cache_control = f'public, max-age={DEFAULT_MAX_AGE}'
+    
+    def add_validators(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(st.st_mtime)
+        response['Cache-Control'] = cache_control
+        response['Accept-Ranges'] = 'bytes'
+        return response
+    
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(st.st_mtime))
+    if not_modified is not None:
+        return add_validators(not_modified)
+    
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    
+    # Web server offload handles ranges itself
+    offloaded = HttpResponse(content_type=content_type)
+    if _offload(full_path, path, offloaded):
+        return add_validators(offloaded)
+    
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag:
+        byte_range = None
+    
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return add_validators(response)
+    
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_read_range(full_path, start, length), status=206, content_type=content_type)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        return add_validators(response)
+    
+    # FileResponse uses wsgi.file_wrapper, i.e. sendfile() where available
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    return add_validators(response)
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:22
+
+import math
+
+from django.db import migrations, models
+
+# Frozen copy of api.utils.grid_cell_for_coords: a migration must keep
+# producing the same data after the live helper changes or is removed
+GRID_CELL_DEGREES = 0.0005
+
+
+def grid_cell_for_coords(coords_string):
+    try:
+        lat, lng = (float(part.strip()) for part in coords_string.split(','))
+    except (ValueError, AttributeError):
+        return None
+    return f"{math.floor(lat / GRID_CELL_DEGREES)}:{math.floor(lng / GRID_CELL_DEGREES)}"
+
+
+def backfill_grid_cells(apps, schema_editor):
+    Complaint = apps.get_model('api', 'Complaint')
+    complaints = list(Complaint.objects.only('id', 'location_coords'))
+    for complaint in complaints:
+        complaint.grid_cell = grid_cell_for_coords(complaint.location_coords)
+    Complaint.objects.bulk_update(complaints, ['grid_cell'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_complaint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='grid_cell',
+            field=models.CharField(blank=True, db_index=True, max_length=32, null=True),
+        ),
+        migrations.RunPython(backfill_grid_cells, migrations.RunPython.noop),
+    ]
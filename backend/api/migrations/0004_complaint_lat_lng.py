@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:23
+
+from django.db import migrations, models
+
+
+# Frozen copy of api.utils.parse_coords: a migration must keep producing
+# the same data after the live helper changes or is removed
+def parse_coords(coords_string):
+    try:
+        parts = coords_string.split(',')
+        if len(parts) == 2:
+            return float(parts[0].strip()), float(parts[1].strip())
+    except (ValueError, AttributeError):
+        pass
+    return None
+
+
+def backfill_lat_lng(apps, schema_editor):
+    Complaint = apps.get_model('api', 'Complaint')
+    complaints = []
+    for complaint in Complaint.objects.only('id', 'location_coords').iterator():
+        point = parse_coords(complaint.location_coords)
+        if point:
+            complaint.latitude, complaint.longitude = point
+            complaints.append(complaint)
+    Complaint.objects.bulk_update(complaints, ['latitude', 'longitude'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_complaint_grid_cell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['latitude', 'longitude'], name='complaint_lat_lng_idx'),
+        ),
+        migrations.RunPython(backfill_lat_lng, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_complaint_lat_lng'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['-urgency_level', '-created_at', '-id'], name='complaint_priority_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_complaint_priority_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['status', 'created_at'], name='complaint_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['complainant', 'location_coords', 'created_at'], name='complaint_spam_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['assigned_to', 'status'], name='complaint_assignee_status_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_complaint_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('complaint_pk', models.BigIntegerField()),
+                ('complaint_id', models.CharField(blank=True, max_length=20)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'db_table': 'complaint_tombstones',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['updated_at', 'id'], name='complaint_updated_idx'),
+        ),
+    ]
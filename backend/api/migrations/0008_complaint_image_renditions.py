@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_complaint_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='image_after_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='image_before_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:31
+
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_complaint_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'media_blobs',
+            },
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='image_before_phash',
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AlterField(
+            model_name='complaint',
+            name='image_after',
+            field=models.ImageField(blank=True, null=True, storage=api.storage.complaint_image_storage, upload_to='complaints/after/'),
+        ),
+        migrations.AlterField(
+            model_name='complaint',
+            name='image_before',
+            field=models.ImageField(blank=True, null=True, storage=api.storage.complaint_image_storage, upload_to='complaints/before/'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'complaint_sequences',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_complaint_sequences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='home_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='home_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
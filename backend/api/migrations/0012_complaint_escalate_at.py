@@ -0,0 +1,52 @@
+# Generated by Django 5.0.1 on 2026-10-17 19:39
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+# Frozen copy of api.escalation.escalation_deadline with the default
+# ESCALATION_SLA_HOURS (16 hours for every complaint): a migration must
+# keep producing the same data after the live helper or the setting changes
+ESCALATION_SLA_HOURS = ((1, 16),)
+
+
+def escalation_deadline(created_at, urgency_level, force=False):
+    if force:
+        return created_at
+    for min_urgency, hours in ESCALATION_SLA_HOURS:
+        if urgency_level >= min_urgency:
+            break
+    else:
+        hours = ESCALATION_SLA_HOURS[-1][1]
+    return created_at + timedelta(hours=hours)
+
+
+def backfill_escalate_at(apps, schema_editor):
+    Complaint = apps.get_model('api', 'Complaint')
+    complaints = []
+    for complaint in Complaint.objects.only('id', 'created_at', 'urgency_level', 'force_escalate').iterator():
+        complaint.escalate_at = escalation_deadline(
+            complaint.created_at, complaint.urgency_level, complaint.force_escalate
+        )
+        complaints.append(complaint)
+    Complaint.objects.bulk_update(complaints, ['escalate_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_user_home_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='escalate_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['status', 'escalate_at'], name='complaint_escalation_idx'),
+        ),
+        migrations.RunPython(backfill_escalate_at, migrations.RunPython.noop),
+    ]
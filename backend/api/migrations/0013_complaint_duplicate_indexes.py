@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:10
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_complaint_escalate_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(django.db.models.functions.text.Lower('location_address'), models.F('created_at'), name='complaint_address_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['grid_cell', 'status', 'created_at'], name='complaint_cell_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_complaint_duplicate_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='complaint',
+            name='grid_cell',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
@@ -5,9 +5,18 @@ Complaint structure is defined here but stored in MongoDB.
 """
 
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import DEFERRED, F, Value
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 
+from .escalation import escalation_deadline, rescheduled_deadline
+from .stats import invalidate_complaint_stats
+from .storage import complaint_image_storage
+from .utils import bounding_box, cells_within_radius, grid_cell, parse_coords
+
 
 class User(AbstractUser):
     """Extended User model with role-based access control (Stored in SQLite)."""
@@ -21,6 +30,9 @@ class User(AbstractUser):
     
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='CITIZEN')
     phone = models.CharField(max_length=15, blank=True, null=True)
+    # Depot / home zone of a collector, used by auto-dispatch
+    home_latitude = models.FloatField(null=True, blank=True)
+    home_longitude = models.FloatField(null=True, blank=True)
     
     class Meta:
         db_table = 'users'
@@ -29,6 +41,47 @@ class User(AbstractUser):
         return f"{self.username} ({self.get_role_display()})"
 
 
+IMAGE_FIELDS = ('image_before', 'image_after')
+
+
+class ComplaintQuerySet(models.QuerySet):
+    
+    def duplicate_candidates(self, latitude, longitude, address, since, radius_meters=50,
+                             photo_radius_meters=None):
+        """
+        Active complaints since `since` that may duplicate a new report: the
+        same address, or inside the grid cells / bounding box of the radius.
+        With photo_radius_meters, photographed complaints inside that wider
+        radius are included too so their perceptual hashes can be compared.
+        Callers still apply the exact distance / hash checks. Addresses
+        compare through LOWER(), which on SQLite folds ASCII letters only.
+        
+        Each criterion is a separate indexed SELECT and the ids are UNIONed:
+        ORed together in one WHERE clause, the planner gives up on the
+        address and grid cell indexes and filters every active complaint.
+        """
+        active = self.filter(status__in=['PENDING', 'ASSIGNED'], created_at__gte=since).order_by()
+        candidates = active.alias(address_lower=Lower('location_address')).filter(
+            address_lower=Lower(Value(address))
+        ).values('pk')
+        if latitude is not None and longitude is not None:
+            min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, radius_meters)
+            candidates = candidates.union(active.filter(
+                grid_cell__in=cells_within_radius(latitude, longitude, radius_meters),
+                latitude__range=(min_lat, max_lat),
+                longitude__range=(min_lng, max_lng),
+            ).values('pk'))
+            if photo_radius_meters:
+                min_lat, min_lng, max_lat, max_lng = bounding_box(latitude, longitude, photo_radius_meters)
+                candidates = candidates.union(active.filter(
+                    grid_cell__in=cells_within_radius(latitude, longitude, photo_radius_meters),
+                    image_before_phash__isnull=False,
+                    latitude__range=(min_lat, max_lat),
+                    longitude__range=(min_lng, max_lng),
+                ).values('pk'))
+        return self.filter(pk__in=candidates)
+
+
 class Complaint(models.Model):
     """Complaint model stored in SQLite."""
     
@@ -44,10 +97,17 @@ class Complaint(models.Model):
     complainant = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='complaints')
     complainant_name = models.CharField(max_length=100, blank=True)
     
-    image_before = models.ImageField(upload_to='complaints/before/', blank=True, null=True)
-    image_after = models.ImageField(upload_to='complaints/after/', blank=True, null=True)
+    image_before = models.ImageField(upload_to='complaints/before/', storage=complaint_image_storage, blank=True, null=True)
+    image_after = models.ImageField(upload_to='complaints/after/', storage=complaint_image_storage, blank=True, null=True)
+    image_before_phash = models.CharField(max_length=16, blank=True, null=True) # dHash, hex
+    # Downscaled, EXIF-stripped copies built in the background: {rendition: url}
+    image_before_renditions = models.JSONField(default=dict, blank=True)
+    image_after_renditions = models.JSONField(default=dict, blank=True)
     
     location_coords = models.CharField(max_length=50) # "lat,lng"
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    grid_cell = models.CharField(max_length=32, blank=True, null=True) # spatial index key (see complaint_cell_idx)
     location_address = models.CharField(max_length=255)
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
@@ -58,28 +118,181 @@ class Complaint(models.Model):
     
     rejected_reason = models.TextField(blank=True, null=True)
     force_escalate = models.BooleanField(default=False)
+    # When the complaint escalates if still open; see api.escalation
+    escalate_at = models.DateTimeField(blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ComplaintQuerySet.as_manager()
+    
     class Meta:
         db_table = 'complaints'
         ordering = ['-urgency_level', '-created_at']
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='complaint_lat_lng_idx'),
+            models.Index(fields=['-urgency_level', '-created_at', '-id'], name='complaint_priority_idx'),
+            # Status filters over a created_at range
+            models.Index(fields=['status', 'created_at'], name='complaint_status_created_idx'),
+            # Spam detection: complainant + exact coords within the last hour
+            models.Index(fields=['complainant', 'location_coords', 'created_at'], name='complaint_spam_idx'),
+            # Collector task lists: assigned_to + status
+            models.Index(fields=['assigned_to', 'status'], name='complaint_assignee_status_idx'),
+            # Delta sync: rows changed since a watermark
+            models.Index(fields=['updated_at', 'id'], name='complaint_updated_idx'),
+            # Duplicate detection, one index per candidate query
+            models.Index(Lower('location_address'), F('created_at'), name='complaint_address_idx'),
+            models.Index(fields=['grid_cell', 'status', 'created_at'], name='complaint_cell_idx'),
+            # Escalation scheduler: status IN (...) AND escalate_at <= now
+            models.Index(fields=['status', 'escalate_at'], name='complaint_escalation_idx'),
+        ]
         
     def __str__(self):
         return f"{self.complaint_id} - {self.status}"
         
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored "lat,lng", urgency and photo names, so save() can tell what was edited
+        instance._loaded_location_coords = instance.__dict__.get('location_coords', DEFERRED)
+        instance._loaded_escalation = (
+            instance.__dict__.get('urgency_level', DEFERRED), instance.__dict__.get('force_escalate', DEFERRED)
+        )
+        instance._loaded_images = {}
+        for field in IMAGE_FIELDS:
+            value = instance.__dict__.get(field, DEFERRED)
+            instance._loaded_images[field] = getattr(value, 'name', value)
+        return instance
+    
+    def _location_coords_changed(self, update_fields=None):
+        if update_fields is not None:
+            return 'location_coords' in update_fields
+        loaded = getattr(self, '_loaded_location_coords', None)
+        if self._state.adding or loaded is None:
+            return True
+        return loaded is not DEFERRED and self.location_coords != loaded
+    
     def save(self, *args, **kwargs):
         if not self.complaint_id:
             # Generate ID only on creation
-            # We need to save first to get PK for a truly unique sequential ID, 
-            # or rely on UUID/Timestamp. Let's stick to the CC-YYYYMMDD-XXXX format
-            # For simplicity in SQLite, we might use a random suffix or count
-            today = timezone.now().strftime('%Y%m%d')
-            import uuid
-            suffix = str(uuid.uuid4().int)[:4]
-            self.complaint_id = f"CC-{today}-{suffix}"
+            self.complaint_id = ComplaintSequence.next_complaint_id()
+        # Keep the numeric coordinates, the "lat,lng" string (still what most
+        # clients send) and the spatial index key in sync. Whichever side was
+        # edited wins; an unchanged string must not undo new lat/lng values.
+        update_fields = kwargs.get('update_fields')
+        point = parse_coords(self.location_coords) if self._location_coords_changed(update_fields) else None
+        if point:
+            self.latitude, self.longitude = point
+        elif self.latitude is not None and self.longitude is not None:
+            if parse_coords(self.location_coords) != (self.latitude, self.longitude):
+                self.location_coords = f"{self.latitude},{self.longitude}"
+        if self.latitude is not None and self.longitude is not None:
+            self.grid_cell = grid_cell(self.latitude, self.longitude)
+        else:
+            self.grid_cell = None
+        if update_fields is not None and {'location_coords', 'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'location_coords', 'latitude', 'longitude', 'grid_cell'}
+        # The escalation clock starts on creation; saves keep it (only an
+        # opt-in restart on assignment moves it, see api.escalation).
+        # Forcing makes the complaint due at once; lifting that goes back
+        # to the deadline counted from creation.
+        loaded_urgency, loaded_force = getattr(self, '_loaded_escalation', (DEFERRED, DEFERRED))
+        if self.force_escalate:
+            self.escalate_at = escalation_deadline(self.created_at or timezone.now(), self.urgency_level, True)
+        elif self.escalate_at is None or loaded_force is True:
+            self.escalate_at = escalation_deadline(self.created_at or timezone.now(), self.urgency_level)
+        elif loaded_urgency is not DEFERRED and loaded_urgency != self.urgency_level:
+            self.escalate_at = rescheduled_deadline(self.escalate_at, loaded_urgency, self.urgency_level)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'urgency_level', 'force_escalate'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'escalate_at'}
+        replaced = self._replaced_images(kwargs.get('update_fields'))
         super().save(*args, **kwargs)
+        # Release the references held by the photos just replaced
+        for field, name in replaced:
+            self._meta.get_field(field).storage.delete(name)
+        self._loaded_location_coords = self.location_coords
+        self._loaded_escalation = (self.urgency_level, self.force_escalate)
+        self._loaded_images = {field: getattr(self, field).name or None for field in IMAGE_FIELDS}
+        invalidate_complaint_stats()
+    
+    def _replaced_images(self, update_fields=None):
+        """(field, stored name) of the photos this save overwrites."""
+        replaced = []
+        for field, loaded in getattr(self, '_loaded_images', {}).items():
+            if not loaded or loaded is DEFERRED or (update_fields is not None and field not in update_fields):
+                continue
+            image = getattr(self, field)
+            # A new upload takes its own reference even when its content
+            # (and so its name) is the same as the old photo's
+            if not image or not image._committed or image.name != loaded:
+                replaced.append((field, loaded))
+        return replaced
+
+
+class ComplaintSequence(models.Model):
+    """Per-day counter behind the CC-YYYYMMDD-NNNNNN complaint IDs."""
+    
+    day = models.DateField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'complaint_sequences'
+    
+    def __str__(self):
+        return f"{self.day}: {self.last_value}"
+    
+    @classmethod
+    def next_complaint_id(cls, day=None):
+        """
+        Allocate the next complaint ID for `day` (default: today, local time).
+        
+        The counter row is incremented with an UPDATE, which locks it until the
+        transaction ends, so concurrent writers get consecutive values without
+        collisions or retries. Zero-padded suffixes keep IDs sorting in order.
+        """
+        return cls.reserve_complaint_ids(day or timezone.localdate(), 1)[0]
+    
+    @classmethod
+    def reserve_complaint_ids(cls, day, count):
+        """Allocate `count` consecutive complaint IDs for `day` in one increment."""
+        with transaction.atomic():
+            if not cls.objects.filter(day=day).update(last_value=F('last_value') + count):
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(day=day, last_value=count)
+                except IntegrityError:
+                    # Another writer created the day's row first
+                    cls.objects.filter(day=day).update(last_value=F('last_value') + count)
+            last = cls.objects.filter(day=day).values_list('last_value', flat=True).get()
+        return [f"CC-{day:%Y%m%d}-{value:06d}" for value in range(last - count + 1, last + 1)]
+
+
+class ComplaintTombstone(models.Model):
+    """Record of a deleted complaint, served to delta-sync clients."""
+    
+    complaint_pk = models.BigIntegerField()
+    complaint_id = models.CharField(max_length=20, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        db_table = 'complaint_tombstones'
+    
+    def __str__(self):
+        return f"{self.complaint_id} deleted at {self.deleted_at}"
+
+
+@receiver(post_delete, sender=Complaint)
+def record_complaint_deletion(sender, instance, **kwargs):
+    # A signal rather than Complaint.delete(): QuerySet.delete() sends it for
+    # every row too. Lets delta-sync clients know the row is gone, and
+    # releases the complaint's references in the content-addressed store.
+    ComplaintTombstone.objects.create(complaint_pk=instance.pk, complaint_id=instance.complaint_id)
+    for field in IMAGE_FIELDS:
+        image = getattr(instance, field)
+        if image:
+            image.storage.delete(image.name)
+    invalidate_complaint_stats()
 
 
 # Complaint Model is now managed via PyMongo directly in views
@@ -107,3 +320,19 @@ class ComplaintStructure:
     - updated_at: datetime
     """
     pass
+
+
+class MediaBlob(models.Model):
+    """A stored file in the content-addressed media store and its reference count."""
+    
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'media_blobs'
+    
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
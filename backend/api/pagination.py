@@ -0,0 +1,98 @@
+"""
+Pagination classes for City Care API.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ComplaintKeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over -urgency_level, -created_at, -id.
+    
+    Each page is fetched with a WHERE clause on the last row seen, so the
+    cost stays O(page size) however deep the client scrolls. Pass
+    ?page_size=N to change the page size or ?page_size=all to disable
+    pagination (exports).
+    """
+    
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-urgency_level', '-created_at', '-id')
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        requested_size = request.query_params.get(self.page_size_query_param)
+        if requested_size == 'all':
+            return None
+        self.size = self.get_page_size(requested_size)
+        
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            urgency, created_at, pk = self.decode_cursor(cursor)
+            # The leading urgency_level <= bound is implied by the OR but lets
+            # the planner SEARCH complaint_priority_idx instead of scanning it
+            queryset = queryset.filter(
+                Q(urgency_level__lt=urgency) |
+                Q(urgency_level=urgency, created_at__lt=created_at) |
+                Q(urgency_level=urgency, created_at=created_at, id__lt=pk),
+                urgency_level__lte=urgency,
+            )
+        
+        # Fetch one extra row to know whether a next page exists
+        rows = list(queryset[:self.size + 1])
+        self.has_next = len(rows) > self.size
+        self.page = rows[:self.size]
+        return self.page
+    
+    def get_page_size(self, requested_size):
+        if requested_size:
+            try:
+                size = int(requested_size)
+            except ValueError:
+                size = 0
+            if size > 0:
+                return min(size, self.max_page_size)
+        return self.page_size
+    
+    def encode_cursor(self, complaint):
+        position = [complaint.urgency_level, complaint.created_at.isoformat(), complaint.id]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+    
+    def decode_cursor(self, cursor):
+        try:
+            urgency, created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return int(urgency), datetime.fromisoformat(created_at), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+    
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,221 @@
+"""
+Visiting-order optimisation for a collector's open complaints.
+
+A route is built by nearest neighbour from the collector's start position
+and improved with 2-opt. Its cost is the distance travelled plus a
+penalty for every minute an urgent stop is reached after its deadline,
+so urgent complaints are pulled forward when that is worth the detour.
+Only the most urgent ROUTE_MAX_STOPS stops are routed, and 2-opt gives up
+after ROUTE_OPTIMISE_SECONDS.
+Results are cached under a signature of the assignment set, so they are
+recomputed only when that set (or a stop in it) changes.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .dispatch import OPEN_STATUSES
+from .models import Complaint
+from .utils import haversine_matrix
+
+ROUTE_CACHE_PREFIX = 'route'
+# Stop improving after this many full 2-opt passes
+MAX_TWO_OPT_PASSES = 50
+# Decimal places kept of the start position (3: about 110 m)
+START_DECIMALS = 3
+
+
+def urgency_deadline(urgency_level):
+    """Minutes from the start of the route by which a stop should be reached, or None."""
+    for min_urgency, minutes in settings.ROUTE_URGENCY_DEADLINES:
+        if urgency_level >= min_urgency:
+            return minutes
+    return None
+
+
+def route_cost(order, matrix, deadlines):
+    """
+    (cost, metres, minutes late) of visiting `order` from node 0.
+    `order` holds matrix indices of the stops (1..n).
+    """
+    metres_per_minute = settings.ROUTE_SPEED_KMH * 1000 / 60
+    service_minutes = settings.ROUTE_SERVICE_MINUTES
+    
+    distance = minutes = late = 0.0
+    previous = 0
+    for stop in order:
+        leg = matrix[previous][stop]
+        distance += leg
+        minutes += leg / metres_per_minute
+        deadline = deadlines[stop]
+        if deadline is not None and minutes > deadline:
+            late += minutes - deadline
+        minutes += service_minutes
+        previous = stop
+    return distance + settings.ROUTE_LATENESS_PENALTY_METERS * late, distance, late
+
+
+def nearest_neighbour(matrix, count, deadlines=None):
+    """
+    Greedy open path over stops 1..count starting at node 0. With
+    `deadlines`, stops are taken by earliest deadline first (the nearest
+    of those), so urgent stops lead the route.
+    """
+    remaining = set(range(1, count + 1))
+    order = []
+    current = 0
+    while remaining:
+        row = matrix[current]
+        if deadlines:
+            current = min(remaining, key=lambda stop: (deadlines[stop] is None, deadlines[stop] or 0, row[stop]))
+        else:
+            current = min(remaining, key=row.__getitem__)
+        remaining.remove(current)
+        order.append(current)
+    return order
+
+
+def two_opt(order, matrix, deadlines, time_limit=None):
+    """
+    Improve an open path by reversing segments while the cost drops.
+    
+    The distance change of a reversal comes in O(1) from the two edges it
+    replaces. Only reversals that shorten the path are considered, and
+    lateness (O(n)) is only re-scored for those. Stops after `time_limit`
+    seconds with the best order found so far.
+    """
+    stop_at = time.monotonic() + time_limit if time_limit else None
+    best_cost, _, _ = route_cost(order, matrix, deadlines)
+    has_deadlines = any(deadline is not None for deadline in deadlines)
+    n = len(order)
+    
+    for _ in range(MAX_TWO_OPT_PASSES):
+        improved = False
+        for i in range(n - 1):
+            if stop_at is not None and time.monotonic() > stop_at:
+                return order
+            row_before = matrix[order[i - 1] if i else 0]
+            first = order[i]
+            for j in range(i + 1, n):
+                last = order[j]
+                delta = row_before[last] - row_before[first]
+                if j + 1 < n:
+                    after = order[j + 1]
+                    delta += matrix[first][after] - matrix[last][after]
+                if delta >= -1e-9:
+                    continue
+                
+                candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                cost = route_cost(candidate, matrix, deadlines)[0] if has_deadlines else best_cost + delta
+                if cost < best_cost - 1e-9:
+                    order, best_cost = candidate, cost
+                    first = order[i]
+                    improved = True
+        if not improved:
+            break
+    return order
+
+
+def plan_route(start, stops):
+    """
+    Optimised visiting order for `stops` (dicts with latitude, longitude
+    and urgency_level) from `start` (lat, lng).
+    Returns (ordered stops, total metres, baseline metres) where the
+    baseline is the distance of visiting the stops in the given order.
+    """
+    if not stops:
+        return [], 0.0, 0.0
+    
+    points = [start] + [(stop['latitude'], stop['longitude']) for stop in stops]
+    matrix = haversine_matrix(points, points)
+    matrix = matrix.tolist() if hasattr(matrix, 'tolist') else matrix
+    deadlines = [None] + [urgency_deadline(stop['urgency_level']) for stop in stops]
+    
+    # 2-opt only takes shorter paths, so urgent stops are pulled forward by
+    # also starting from an urgent-first order; the cheaper result wins
+    starts = [nearest_neighbour(matrix, len(stops))]
+    if any(deadline is not None for deadline in deadlines):
+        starts.append(nearest_neighbour(matrix, len(stops), deadlines))
+    time_limit = settings.ROUTE_OPTIMISE_SECONDS / len(starts)
+    order = min(
+        (two_opt(start_order, matrix, deadlines, time_limit) for start_order in starts),
+        key=lambda candidate: route_cost(candidate, matrix, deadlines)[0],
+    )
+    
+    metres_per_minute = settings.ROUTE_SPEED_KMH * 1000 / 60
+    ordered = []
+    minutes = 0.0
+    previous = 0
+    for position, index in enumerate(order, start=1):
+        leg = matrix[previous][index]
+        minutes += leg / metres_per_minute
+        stop = dict(stops[index - 1])
+        stop.update({
+            'order': position,
+            'leg_meters': round(leg, 1),
+            'arrival_minutes': round(minutes, 1),
+            'deadline_minutes': deadlines[index],
+            'late': deadlines[index] is not None and minutes > deadlines[index],
+        })
+        ordered.append(stop)
+        minutes += settings.ROUTE_SERVICE_MINUTES
+        previous = index
+    
+    _, total, _ = route_cost(order, matrix, deadlines)
+    _, baseline, _ = route_cost(list(range(1, len(stops) + 1)), matrix, deadlines)
+    return ordered, total, baseline
+
+
+def collector_route(collector, start=None):
+    """
+    Cached route over the collector's open, located complaints. `start`
+    defaults to the collector's home, then DISPATCH_DEFAULT_CENTER.
+    """
+    if start is None:
+        if collector.home_latitude is not None and collector.home_longitude is not None:
+            start = (collector.home_latitude, collector.home_longitude)
+        else:
+            start = tuple(settings.DISPATCH_DEFAULT_CENTER)
+    # Snap the start so GPS jitter around one spot reuses the cached route
+    start = (round(start[0], START_DECIMALS), round(start[1], START_DECIMALS))
+    
+    stops = list(
+        Complaint.objects.filter(
+            assigned_to=collector, status__in=OPEN_STATUSES, latitude__isnull=False,
+        ).order_by('-urgency_level', '-created_at', '-id').values(
+            'id', 'complaint_id', 'location_address', 'latitude', 'longitude',
+            'urgency_level', 'status', 'updated_at',
+        )[:settings.ROUTE_MAX_STOPS + 1]
+    )
+    # Only the most urgent ROUTE_MAX_STOPS are routed
+    truncated = len(stops) > settings.ROUTE_MAX_STOPS
+    stops = stops[:settings.ROUTE_MAX_STOPS]
+    
+    signature = hashlib.sha1(repr((
+        start,
+        sorted((stop['id'], stop['updated_at'].isoformat(), stop['latitude'],
+                stop['longitude'], stop['urgency_level']) for stop in stops),
+    )).encode()).hexdigest()
+    key = f'{ROUTE_CACHE_PREFIX}:{collector.pk}:{signature}'
+    
+    route = cache.get(key)
+    if route is not None:
+        return dict(route, cached=True)
+    
+    for stop in stops:
+        del stop['updated_at']
+    ordered, total, baseline = plan_route(start, stops)
+    route = {
+        'collector_id': collector.pk,
+        'start': {'latitude': start[0], 'longitude': start[1]},
+        'stops': ordered,
+        'total_meters': round(total, 1),
+        'baseline_meters': round(baseline, 1),
+        'late_stops': sum(stop['late'] for stop in ordered),
+        'truncated': truncated,
+    }
+    cache.set(key, route, settings.ROUTE_CACHE_TTL)
+    return dict(route, cached=False)
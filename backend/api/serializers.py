@@ -3,8 +3,11 @@ Serializers for City Care API.
 Adapted for Hybrid SQLite/MongoDB architecture.
 """
 
+from django.db import models
 from rest_framework import serializers
 from .models import User, Complaint
+from .uploads import HeaderValidatedImageField
+from .utils import parse_coords
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -14,7 +17,8 @@ class UserSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'role', 'role_display', 'first_name', 'last_name', 'phone']
+        fields = ['id', 'username', 'email', 'role', 'role_display', 'first_name', 'last_name', 'phone',
+                  'home_latitude', 'home_longitude']
         read_only_fields = ['id']
 
 
@@ -43,14 +47,63 @@ class ComplaintSerializer(serializers.ModelSerializer):
     class Meta:
         model = Complaint
         fields = '__all__'
+        # Derived on save or by the image worker; clients edit location_coords
+        read_only_fields = ['latitude', 'longitude', 'grid_cell', 'escalate_at', 'image_before_phash',
+                            'image_before_renditions', 'image_after_renditions']
+
+
+class LeanComplaintSerializer(serializers.BaseSerializer):
+    """
+    Read-only serializer producing the same payload as ComplaintSerializer
+    without per-field DRF overhead. Used for large list responses; expects
+    a queryset with the user relations select_related.
+    """
+    
+    datetime_field = serializers.DateTimeField()
+    
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        data = {}
+        for field in Complaint._meta.concrete_fields:
+            value = getattr(instance, field.attname)
+            if isinstance(field, models.FileField):
+                if value:
+                    url = value.url
+                    value = request.build_absolute_uri(url) if request is not None else url
+                else:
+                    value = None
+            elif isinstance(field, models.DateTimeField) and value is not None:
+                value = self.datetime_field.to_representation(value)
+            data[field.name] = value
+        
+        for relation in ('complainant', 'assigned_to', 'assigned_by'):
+            user = getattr(instance, relation)
+            # ComplaintSerializer omits the key when the relation is empty
+            if user is not None:
+                data[f'{relation}_username'] = user.username
+        return data
 
 
 class ComplaintCreateSerializer(serializers.ModelSerializer):
-    image_before = serializers.ImageField(required=False)
+    image_before = HeaderValidatedImageField(required=False)
+    location_coords = serializers.CharField(max_length=50, required=False)
+    latitude = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=False, min_value=-180, max_value=180)
     
     class Meta:
         model = Complaint
-        fields = ['complainant_name', 'location_coords', 'location_address', 'image_before']
+        fields = ['complainant_name', 'location_coords', 'latitude', 'longitude', 'location_address', 'image_before']
+    
+    def validate(self, attrs):
+        # Accept either the legacy "lat,lng" string or numeric latitude/longitude
+        point = parse_coords(attrs.get('location_coords'))
+        if point:
+            attrs['latitude'], attrs['longitude'] = point
+        elif attrs.get('latitude') is not None and attrs.get('longitude') is not None:
+            attrs['location_coords'] = f"{attrs['latitude']},{attrs['longitude']}"
+        elif not attrs.get('location_coords'):
+            raise serializers.ValidationError('Provide location_coords as "lat,lng" or latitude and longitude.')
+        return attrs
 
 
 class AssignComplaintSerializer(serializers.Serializer):
@@ -60,9 +113,81 @@ class AssignComplaintSerializer(serializers.Serializer):
 
 class ResolveComplaintSerializer(serializers.Serializer):
     """Serializer for resolving complaints."""
-    image_after = serializers.ImageField()
+    image_after = HeaderValidatedImageField(required=False)
 
 
 class RejectComplaintSerializer(serializers.Serializer):
     """Serializer for rejecting complaints."""
     reason = serializers.CharField()
+
+
+class BulkActionSerializer(serializers.Serializer):
+    """
+    Base for bulk complaint actions. Accepts per-item values in `items`,
+    and/or `ids` plus the `shared_fields` values applied to all of them.
+    Validates to {'items': [...]}.
+    """
+    
+    shared_fields = ()
+    max_items = 1000
+    
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    
+    def validate(self, attrs):
+        items = list(attrs.get('items', []))
+        ids = attrs.get('ids', [])
+        if ids:
+            shared = {}
+            for field in self.shared_fields:
+                if attrs.get(field) is None:
+                    raise serializers.ValidationError({field: 'This field is required with ids.'})
+                shared[field] = attrs[field]
+            items += [{'id': pk, **shared} for pk in ids]
+        
+        if not items:
+            raise serializers.ValidationError('Provide ids or items.')
+        if len(items) > self.max_items:
+            raise serializers.ValidationError(f'At most {self.max_items} complaints per request.')
+        return {'items': items}
+
+
+class BulkAssignItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    collector_id = serializers.IntegerField()
+
+
+class BulkAssignSerializer(BulkActionSerializer):
+    """Serializer for assigning many complaints."""
+    shared_fields = ('collector_id',)
+    collector_id = serializers.IntegerField(required=False)
+    items = BulkAssignItemSerializer(many=True, required=False)
+
+
+class BulkResolveItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+
+
+class BulkResolveSerializer(BulkActionSerializer):
+    """Serializer for resolving many complaints."""
+    items = BulkResolveItemSerializer(many=True, required=False)
+
+
+class BulkRejectItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    reason = serializers.CharField()
+
+
+class BulkRejectSerializer(BulkActionSerializer):
+    """Serializer for rejecting many complaints."""
+    shared_fields = ('reason',)
+    reason = serializers.CharField(required=False)
+    items = BulkRejectItemSerializer(many=True, required=False)
+
+
+class AutoDispatchSerializer(serializers.Serializer):
+    """Serializer for auto-dispatch requests; a dry run unless apply is set."""
+    apply = serializers.BooleanField(default=False)
+    complaint_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    collector_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    max_open = serializers.IntegerField(min_value=1, required=False)
+    load_penalty_meters = serializers.FloatField(min_value=0, required=False)
@@ -0,0 +1,70 @@
+"""
+Cached dashboard statistics for City Care.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+STATS_CACHE_KEY = 'complaint_stats'
+ACTIVE_STATUSES = ('PENDING', 'ASSIGNED', 'ESCALATED')
+
+
+def invalidate_complaint_stats():
+    """
+    Drop the cached stats; call after any write that can change a status.
+    
+    Inside a transaction the key is dropped on commit: dropping it earlier
+    lets a concurrent request cache counts that miss the uncommitted write.
+    """
+    transaction.on_commit(lambda: cache.delete(STATS_CACHE_KEY))
+
+
+def _empty_counts():
+    return {'total': 0, 'pending': 0, 'assigned': 0, 'resolved': 0,
+            'rejected': 0, 'escalated': 0, 'active': 0}
+
+
+def _add(counts, status, n):
+    counts['total'] += n
+    key = status.lower()
+    if key in counts:
+        counts[key] += n
+    if status in ACTIVE_STATUSES:
+        counts['active'] += n
+
+
+def compute_complaint_stats():
+    """
+    Aggregate status counts, overall and per collector, in one GROUP BY query.
+    """
+    from .models import Complaint
+    
+    rows = (
+        Complaint.objects.order_by()
+        .values('status', 'assigned_to_id')
+        .annotate(n=Count('id'))
+    )
+    
+    totals = _empty_counts()
+    by_collector = defaultdict(_empty_counts)
+    for row in rows:
+        _add(totals, row['status'], row['n'])
+        if row['assigned_to_id'] is not None:
+            _add(by_collector[row['assigned_to_id']], row['status'], row['n'])
+    
+    return {'totals': totals, 'by_collector': dict(by_collector)}
+
+
+def get_complaint_stats():
+    """
+    Return the stats snapshot, recomputing it at most once per cache TTL.
+    """
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_complaint_stats()
+        cache.set(STATS_CACHE_KEY, stats, getattr(settings, 'STATS_CACHE_TTL', 5))
+    return stats
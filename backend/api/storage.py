@@ -0,0 +1,116 @@
+"""
+Content-addressed storage for complaint photos.
+
+Files are named by the SHA-256 of their bytes, so a photo uploaded again
+(a common pattern for duplicate complaints) is stored once. A MediaBlob
+row per file counts references; the file and its renditions are removed
+when the last reference is deleted.
+"""
+
+import hashlib
+import os
+import uuid
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+from .locking import lock_media_blob
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that stores files as cas/ab/cd/<sha256><ext>."""
+    
+    prefix = 'cas'
+    
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content hash in _save
+        return name
+    
+    def _digest(self, content):
+        sha = hashlib.sha256()
+        size = 0
+        content.seek(0)
+        for chunk in content.chunks():
+            sha.update(chunk)
+            size += len(chunk)
+        content.seek(0)
+        return sha.hexdigest(), size
+    
+    def _write(self, full_path, content):
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_path = f'{full_path}.{uuid.uuid4().hex}.tmp'
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), tmp_path)
+        else:
+            with open(tmp_path, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+        if self.file_permissions_mode is not None:
+            os.chmod(tmp_path, self.file_permissions_mode)
+        # Concurrent writers of the same content race harmlessly here
+        os.replace(tmp_path, full_path)
+    
+    def _save(self, name, content):
+        from .models import MediaBlob
+        
+        digest, size = self._digest(content)
+        # No savepoint: inside the caller's transaction (the usual case) the
+        # lock is held until it commits, and an error here fails it anyway
+        with transaction.atomic(savepoint=False):
+            # Serialized with delete() of the same content, which may be
+            # about to remove the file
+            lock_media_blob(digest)
+            blob = MediaBlob.objects.filter(sha256=digest).first()
+            if blob and MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1):
+                return blob.name
+            
+            ext = os.path.splitext(name)[1].lower()
+            cas_name = f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+            full_path = self.path(cas_name)
+            if not os.path.exists(full_path):
+                self._write(full_path, content)
+            
+            # The lock guarantees no other writer created the row meanwhile
+            MediaBlob.objects.create(sha256=digest, name=cas_name, size=size, refcount=1)
+        return cas_name
+    
+    def delete(self, name):
+        """
+        Drop one reference to `name`; remove the file and its renditions
+        with the last one. Files written before this storage existed are
+        left alone.
+        
+        The count is changed under the blob lock, inside the caller's
+        transaction; the file is only removed once that commits.
+        """
+        from .models import MediaBlob
+        
+        digest = os.path.splitext(os.path.basename(name))[0]
+        with transaction.atomic(savepoint=False):
+            lock_media_blob(digest)
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                return
+            if blob.refcount > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                return
+            blob.delete()
+            transaction.on_commit(lambda: self._remove_unreferenced(digest, name))
+    
+    def _remove_unreferenced(self, digest, name):
+        from .imaging import delete_renditions
+        from .models import MediaBlob
+        
+        with transaction.atomic():
+            lock_media_blob(digest)
+            # A save of the same content may have stored it again meanwhile
+            if MediaBlob.objects.filter(name=name).exists():
+                return
+            super().delete(name)
+            delete_renditions(name)
+
+
+def complaint_image_storage():
+    return ContentAddressedStorage()
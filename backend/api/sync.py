@@ -0,0 +1,95 @@
+"""
+Delta sync ("changes since") support for City Care dashboards.
+
+Deletions are served from tombstones, which are kept for
+SYNC_TOMBSTONE_RETENTION_DAYS (see prune_tombstones). A client that last
+synced before that window may have missed deletions and is told to resync.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Complaint, ComplaintTombstone
+
+
+def encode_watermark(updated_at, pk, synced_at):
+    """
+    Encode a (updated_at, id) position and the time of the sync that
+    produced it as an opaque watermark token.
+    """
+    position = [updated_at.isoformat(), pk, synced_at.isoformat()]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_watermark(token):
+    """
+    Decode a watermark token into (updated_at, id, synced_at).
+    Raises ValueError if the token is malformed.
+    """
+    try:
+        updated_at, pk, *synced_at = json.loads(base64.urlsafe_b64decode(token.encode()))
+        updated_at = datetime.fromisoformat(updated_at)
+        # Tokens issued before synced_at was added
+        synced_at = datetime.fromisoformat(synced_at[0]) if synced_at else updated_at
+        return updated_at, int(pk), synced_at
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid watermark: {e}')
+
+
+def tombstone_cutoff(now=None):
+    """Tombstones older than this may have been pruned."""
+    return (now or timezone.now()) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones past the retention window; returns how many."""
+    deleted, _ = ComplaintTombstone.objects.filter(deleted_at__lt=tombstone_cutoff(now)).delete()
+    return deleted
+
+
+def changes_since(token=None, limit=500):
+    """
+    Complaints created or changed after the watermark, plus deletions.
+    
+    Returns (changed, deleted_ids, new_watermark, has_more, resync). Rows are
+    ordered by (updated_at, id) so a capped batch resumes exactly where it
+    stopped. With no token every complaint is returned (initial sync). The
+    same happens, with resync set, when the client last synced before the
+    tombstone retention window: it must then replace its local copy.
+    """
+    now = timezone.now()
+    changed = Complaint.objects.select_related('complainant', 'assigned_to', 'assigned_by')
+    deleted = ComplaintTombstone.objects.all()
+    since, since_pk = None, 0
+    
+    resync = False
+    if token:
+        since, since_pk, synced_at = decode_watermark(token)
+        if synced_at < tombstone_cutoff(now):
+            since, since_pk, resync = None, 0, True
+    
+    if since is not None:
+        changed = changed.filter(Q(updated_at__gt=since) | Q(updated_at=since, id__gt=since_pk))
+        deleted = deleted.filter(deleted_at__gt=since)
+    else:
+        # Nothing the client holds can have been deleted
+        deleted = deleted.none()
+    
+    rows = list(changed.order_by('updated_at', 'id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    tombstones = list(deleted.order_by('deleted_at'))
+    
+    position = (since, since_pk)
+    if rows:
+        position = (rows[-1].updated_at, rows[-1].id)
+    if tombstones and not has_more and (position[0] is None or tombstones[-1].deleted_at > position[0]):
+        position = (tombstones[-1].deleted_at, 0)
+    
+    watermark = encode_watermark(*position, now) if position[0] is not None else None
+    return rows, [t.complaint_pk for t in tombstones], watermark, has_more, resync
@@ -0,0 +1,927 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from . import utils
+from .conditional import latest_change_etag
+from .dispatch import apply_dispatch, plan_dispatch
+from .escalation import due_complaints, sla_hours
+from .events import bus, stream_events
+from .imaging import PHOTO_DUPLICATE_RADIUS, RENDITION_SIZES, process_complaint_image
+from .locking import lock_location
+from .media import parse_range
+from .models import Complaint, ComplaintSequence, ComplaintTombstone, MediaBlob, User
+from .pagination import ComplaintKeysetPagination
+from .routing import collector_route, route_cost, two_opt
+from .sync import changes_since, encode_watermark, prune_tombstones
+from .utils import haversine_matrix
+
+
+class ComplaintQueryCountTests(TestCase):
+    """Complaint read endpoints run a fixed number of queries, whatever the row count."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = User.objects.create_user('officer', password='x', role='OFFICER')
+        cls.collectors = [
+            User.objects.create_user(f'collector{i}', password='x', role='COLLECTOR') for i in range(3)
+        ]
+        citizens = [User.objects.create_user(f'citizen{i}', password='x') for i in range(5)]
+        cls.complaints = [
+            Complaint.objects.create(
+                complainant=citizens[i % 5],
+                complainant_name=f'Citizen {i % 5}',
+                location_coords=f'11.{i:04d},76.9558',
+                location_address=f'{i}, Gandhipuram, Coimbatore',
+                urgency_level=1 + i % 4,
+                status='ASSIGNED' if i % 2 else 'PENDING',
+                assigned_to=cls.collectors[i % 3] if i % 2 else None,
+                assigned_by=cls.officer if i % 2 else None,
+            )
+            for i in range(60)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def test_list(self):
+        # Two index lookups for the ETag, then the page with its users joined in
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/complaints/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 50)
+        usernames = {row.get('assigned_to_username') for row in response.data['results']}
+        self.assertTrue(usernames >= {'collector0', 'collector1', 'collector2'})
+
+    def test_list_next_page(self):
+        first = self.client.get('/api/complaints/?page_size=25')
+        with self.assertNumQueries(3):
+            response = self.client.get(first.data['next'])
+        self.assertEqual(len(response.data['results']), 25)
+
+    def test_lean_list(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/complaints/?lean=1&page_size=all')
+        self.assertEqual(len(response.data), 60)
+
+    def test_list_not_modified(self):
+        etag = self.client.get('/api/complaints/')['ETag']
+        # Latest updated_at and latest tombstone, whatever the page
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/complaints/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_etag_changes_on_delete(self):
+        etag = self.client.get('/api/complaints/')['ETag']
+        Complaint.objects.filter(pk=self.complaints[-1].pk).delete()
+        response = self.client.get('/api/complaints/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_retrieve(self):
+        complaint = self.complaints[1]
+        # updated_at for the ETag, then the complaint with its users
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/complaints/{complaint.pk}/')
+        self.assertEqual(response.data['complaint_id'], complaint.complaint_id)
+
+    def test_retrieve_non_numeric_id(self):
+        self.assertEqual(self.client.get('/api/complaints/abc/').status_code, 404)
+
+    def test_stats(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/stats/?breakdown=collector')
+        self.assertEqual(response.data['total'], 60)
+        self.assertEqual(response.data['assigned'], 30)
+        self.assertEqual(len(response.data['by_collector']), 3)
+        # Served from the cache
+        with self.assertNumQueries(0):
+            self.client.get('/api/stats/')
+
+
+class ComplaintUpdateTests(TestCase):
+    """PATCH/PUT can't overwrite fields derived from others."""
+
+    def test_derived_fields_are_read_only(self):
+        complaint = Complaint.objects.create(location_coords='11.0168,76.9558', location_address='1, Town Hall')
+        derived = {
+            'latitude': 12.5, 'longitude': 77.5, 'grid_cell': '1:1', 'escalate_at': '2030-01-01T00:00:00Z',
+            'image_before_phash': 'ffffffffffffffff', 'image_before_renditions': '{"thumb": "/x.webp"}',
+            'image_after_renditions': '{"thumb": "/x.webp"}',
+        }
+        response = APIClient().patch(f'/api/complaints/{complaint.pk}/', {**derived, 'location_coords': '11.02,76.96'})
+        self.assertEqual(response.status_code, 200, response.content)
+        
+        updated = Complaint.objects.get(pk=complaint.pk)
+        self.assertEqual((updated.latitude, updated.longitude), (11.02, 76.96))
+        self.assertNotEqual(updated.grid_cell, '1:1')
+        self.assertEqual(updated.escalate_at, complaint.escalate_at)
+        self.assertIsNone(updated.image_before_phash)
+        self.assertEqual((updated.image_before_renditions, updated.image_after_renditions), ({}, {}))
+
+
+class QueryPlanTests(TestCase):
+    """The hot complaint queries SEARCH the index meant for them (SQLite plans)."""
+
+    def explain(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertSearches(self, queryset, *indexes):
+        """Every index in `indexes` is SEARCHed and no step scans the table."""
+        sql, params = queryset.query.sql_with_params()
+        plan = self.explain(sql, params)
+        details = '\n'.join(plan)
+        for index in indexes:
+            self.assertTrue(
+                any(step.startswith('SEARCH') and f' USING INDEX {index} (' in step for step in plan),
+                f'No SEARCH on {index} in:\n{details}',
+            )
+        self.assertFalse(
+            [step for step in plan if step.startswith(('SCAN complaints', 'SCAN U0'))],
+            f'Scan in:\n{details}',
+        )
+        return plan
+
+    def test_duplicate_detection(self):
+        since = timezone.now() - timedelta(hours=24)
+        plan = self.assertSearches(
+            Complaint.objects.duplicate_candidates(11.0168, 76.9558, '12, Gandhipuram, Coimbatore', since),
+            'complaint_address_idx', 'complaint_cell_idx',
+        )
+        self.assertFalse([step for step in plan if 'complaint_status_created_idx' in step])
+
+    def test_duplicate_detection_with_photo(self):
+        since = timezone.now() - timedelta(hours=24)
+        plan = self.assertSearches(
+            Complaint.objects.duplicate_candidates(
+                11.0168, 76.9558, '12, Gandhipuram, Coimbatore', since,
+                photo_radius_meters=PHOTO_DUPLICATE_RADIUS,
+            ),
+            'complaint_address_idx', 'complaint_cell_idx',
+        )
+        self.assertEqual(len([step for step in plan if 'complaint_cell_idx' in step]), 2)
+
+    def test_escalation_due_batch(self):
+        self.assertSearches(
+            due_complaints(timezone.now()).order_by('escalate_at', 'id')[:500], 'complaint_escalation_idx'
+        )
+
+    def test_spam_detection(self):
+        self.assertSearches(
+            Complaint.objects.filter(
+                complainant_id=1,
+                created_at__gte=timezone.now() - timedelta(hours=1),
+                location_coords='11.0168,76.9558',
+            ),
+            'complaint_spam_idx',
+        )
+
+    def test_collector_task_list(self):
+        self.assertSearches(
+            Complaint.objects.filter(assigned_to_id=1, status__in=['ASSIGNED']), 'complaint_assignee_status_idx'
+        )
+
+    def test_delta_sync(self):
+        now = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            changes_since(encode_watermark(now - timedelta(minutes=5), 10, now))
+        plan = self.explain(queries.captured_queries[0]['sql'])
+        self.assertIn('SEARCH complaints USING INDEX complaint_updated_idx (updated_at>?)', plan)
+
+    def test_complaint_list_first_page(self):
+        # No WHERE clause: reading the ordering index until the LIMIT is the plan
+        sql, params = Complaint.objects.order_by('-urgency_level', '-created_at', '-id')[:51].query.sql_with_params()
+        self.assertEqual(self.explain(sql, params), ['SCAN complaints USING INDEX complaint_priority_idx'])
+
+    def test_list_etag(self):
+        with CaptureQueriesContext(connection) as queries:
+            latest_change_etag(
+                RequestFactory().get('/api/complaints/'), (Complaint.objects.all(), 'updated_at'),
+            )
+        plan = self.explain(queries.captured_queries[0]['sql'])
+        self.assertEqual(plan, ['SEARCH complaints USING COVERING INDEX complaint_updated_idx'])
+
+    def test_keyset_next_page(self):
+        pagination = ComplaintKeysetPagination()
+        cursor = pagination.encode_cursor(Complaint(urgency_level=3, created_at=timezone.now(), id=1000))
+        request = Request(RequestFactory().get('/api/complaints/', {'cursor': cursor}))
+        with CaptureQueriesContext(connection) as queries:
+            pagination.paginate_queryset(Complaint.objects.all(), request)
+        plan = self.explain(queries.captured_queries[0]['sql'])
+        self.assertIn('SEARCH complaints USING INDEX complaint_priority_idx (urgency_level<?)', plan)
+
+
+class DeltaSyncTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.complaints = [
+            Complaint.objects.create(location_coords=f'11.{i:04d},76.9558', location_address=f'{i}, Town Hall')
+            for i in range(3)
+        ]
+
+    def changes(self, since=None):
+        response = self.client.get('/api/complaints/changes/', {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_queryset_delete_is_reported(self):
+        watermark = self.changes()['watermark']
+        Complaint.objects.filter(pk__in=[c.pk for c in self.complaints[:2]]).delete()
+        data = self.changes(watermark)
+        self.assertCountEqual(data['deleted'], [c.pk for c in self.complaints[:2]])
+        self.assertFalse(data['resync'])
+
+    def test_expired_watermark_resyncs(self):
+        synced_at = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1)
+        data = self.changes(encode_watermark(timezone.now(), self.complaints[-1].pk, synced_at))
+        self.assertTrue(data['resync'])
+        self.assertEqual(len(data['changed']), 3)
+        # The new watermark is current again
+        self.assertFalse(self.changes(data['watermark'])['resync'])
+
+    def test_prune_tombstones(self):
+        old, recent = (c.pk for c in self.complaints[:2])
+        Complaint.objects.filter(pk__in=[old, recent]).delete()
+        ComplaintTombstone.objects.filter(complaint_pk=old).update(
+            deleted_at=timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1)
+        )
+        self.assertEqual(prune_tombstones(), 1)
+        self.assertEqual(list(ComplaintTombstone.objects.values_list('complaint_pk', flat=True)), [recent])
+
+    def test_invalid_limit(self):
+        for limit in ('0', '-1', 'many'):
+            response = self.client.get('/api/complaints/changes/', {'limit': limit})
+            self.assertEqual(response.status_code, 400, limit)
+
+    def test_limited_batches_advance(self):
+        first = self.client.get('/api/complaints/changes/', {'limit': 1}).data
+        second = self.client.get('/api/complaints/changes/', {'limit': 1, 'since': first['watermark']}).data
+        self.assertTrue(first['has_more'])
+        self.assertNotEqual(first['changed'][0]['id'], second['changed'][0]['id'])
+
+    def test_single_actions_lock_before_reading(self):
+        officer = User.objects.create_user('officer', password='x', role='OFFICER')
+        self.client.force_authenticate(officer)
+        complaint = self.complaints[0]
+        for path, data in (('assign/', {'collector_id': officer.pk}), ('reject/', {'reason': 'Cleared'}),
+                           ('resolve/', {})):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(f'/api/complaints/{complaint.pk}/{path}', data)
+            self.assertEqual(response.status_code, 200, path)
+            statements = [query['sql'] for query in queries.captured_queries]
+            lock = statements.index('UPDATE complaints SET id = id WHERE 0')
+            read = next(i for i, sql in enumerate(statements) if sql.startswith('SELECT') and 'FROM "complaints"' in sql)
+            self.assertLess(lock, read, path)
+
+
+def jpeg_upload(color, name='photo.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), color).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ComplaintImageStorageTests(TestCase):
+    """Photo references in the content-addressed store, and their renditions."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+
+    def create_complaint(self, photo):
+        complaint = Complaint.objects.create(
+            location_coords='11.0168,76.9558', location_address='1, Town Hall', image_before=photo
+        )
+        process_complaint_image(complaint.pk, 'image_before')
+        complaint.refresh_from_db()
+        return complaint
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, f), settings.MEDIA_ROOT)
+            for directory, _, files in os.walk(settings.MEDIA_ROOT) for f in files
+        )
+
+    def test_last_reference_removes_file_and_renditions(self):
+        first = self.create_complaint(jpeg_upload('red'))
+        second = self.create_complaint(jpeg_upload('red'))
+        self.assertEqual(first.image_before.name, second.image_before.name)
+        self.assertEqual(len(self.stored_files()), 1 + len(RENDITION_SIZES))
+        
+        first.delete()
+        self.assertEqual(MediaBlob.objects.get().refcount, 1)
+        self.assertEqual(len(self.stored_files()), 1 + len(RENDITION_SIZES))
+        
+        # Files go once the deleting transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            Complaint.objects.filter(pk=second.pk).delete()
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_replaced_photo_is_released(self):
+        complaint = self.create_complaint(jpeg_upload('red'))
+        old_name = complaint.image_before.name
+        
+        complaint = Complaint.objects.get(pk=complaint.pk)
+        complaint.image_before = jpeg_upload('white')
+        with self.captureOnCommitCallbacks(execute=True):
+            complaint.save()
+        self.assertEqual(list(MediaBlob.objects.values_list('name', 'refcount')), [(complaint.image_before.name, 1)])
+        self.assertNotIn(old_name, self.stored_files())
+        
+        # The same content uploaded again keeps a single reference
+        complaint = Complaint.objects.get(pk=complaint.pk)
+        complaint.image_before = jpeg_upload('white')
+        complaint.save()
+        self.assertEqual(MediaBlob.objects.get().refcount, 1)
+
+    def test_resolve_without_photo_keeps_renditions(self):
+        complaint = self.create_complaint(jpeg_upload('blue'))
+        with mock.patch('api.views.schedule_image_processing') as schedule:
+            response = self.client.post(f'/api/complaints/{complaint.pk}/resolve/', {})
+        self.assertEqual(response.status_code, 200)
+        schedule.assert_not_called()
+        
+        with mock.patch('api.views.schedule_image_processing') as schedule:
+            self.client.post(f'/api/complaints/{complaint.pk}/resolve/', {'image_after': jpeg_upload('green')})
+        schedule.assert_called_once()
+
+    def test_only_jpegs_are_hashed_in_the_request(self):
+        buffer = BytesIO()
+        Image.new('RGB', (64, 48), 'red').save(buffer, 'PNG')
+        uploads = {
+            'jpeg': ('11.0168,76.9558', jpeg_upload('red')),
+            'png': ('11.0268,76.9658', SimpleUploadedFile('photo.png', buffer.getvalue(), content_type='image/png')),
+        }
+        for kind, (coords, photo) in uploads.items():
+            # A PNG is never decoded inside the request
+            with mock.patch('api.views.schedule_image_processing'), \
+                    mock.patch.object(Image.Image, 'load', autospec=True, side_effect=Image.Image.load) as load:
+                response = self.client.post('/api/complaints/', {
+                    'location_coords': coords, 'location_address': f'1, {kind} Street', 'image_before': photo,
+                })
+            self.assertEqual(response.status_code, 201, response.content)
+            self.assertEqual(load.called, kind == 'jpeg')
+            complaint = Complaint.objects.get(pk=response.data['complaint']['id'])
+            self.assertEqual(complaint.image_before_phash is not None, kind == 'jpeg')
+            
+            # The worker hashes whatever the request skipped
+            process_complaint_image(complaint.pk, 'image_before')
+            complaint.refresh_from_db()
+            self.assertRegex(complaint.image_before_phash, '^[0-9a-f]{16}$')
+
+
+class UploadLimitTests(TestCase):
+    """Over-limit uploads are cut off while streaming and leave no temp files."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        settings_override = self.settings(MEDIA_ROOT=media_root, FILE_UPLOAD_TEMP_DIR=self.temp_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+
+    def submit(self, photo):
+        with mock.patch('api.views.schedule_image_processing'):
+            return self.client.post('/api/complaints/', {
+                'location_coords': '11.0168,76.9558', 'location_address': '1, Town Hall', 'image_before': photo,
+            })
+
+    def test_within_limits(self):
+        response = self.submit(jpeg_upload('red'))
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_too_many_bytes(self):
+        with override_settings(MAX_UPLOAD_BYTES=500):
+            response = self.submit(jpeg_upload('red'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('larger than 500 bytes', response.data['detail'])
+        self.assertFalse(Complaint.objects.exists())
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_too_many_pixels(self):
+        with override_settings(MAX_UPLOAD_PIXELS=64 * 48 - 1):
+            response = self.submit(jpeg_upload('red'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('64x48', response.data['detail'])
+        self.assertFalse(Complaint.objects.exists())
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+
+class MediaServingTests(TestCase):
+    """Range requests and web server offload in api.media.serve_media."""
+
+    content = bytes(range(100))
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.path = os.path.join(media_root, 'complaints', 'photo.jpg')
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(self.content)
+
+    def get(self, **headers):
+        response = self.client.get('/media/complaints/photo.jpg', **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=10-19', 100), (10, 19))
+        self.assertEqual(parse_range('bytes=90-150', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-500', 100), (0, 99))
+        self.assertEqual(parse_range('bytes=95-', 100), (95, 99))
+        for header in ('bytes=100-', 'bytes=20-10', 'bytes=-0'):
+            self.assertEqual(parse_range(header, 100), 'unsatisfiable', header)
+        # Not a (single) byte range: the whole file is served
+        for header in (None, '', 'bytes=-', 'bytes=0-1,5-6', 'items=0-1'):
+            self.assertIsNone(parse_range(header, 100), header)
+
+    def test_ranges(self):
+        for header, (start, end) in [('bytes=10-19', (10, 19)), ('bytes=-10', (90, 99)), ('bytes=95-', (95, 99))]:
+            response = self.get(HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/100')
+            self.assertEqual(response['Content-Length'], str(end - start + 1))
+            self.assertEqual(response.getvalue(), self.content[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_multiple_ranges_serve_whole_file(self):
+        response = self.get(HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.getvalue(), self.content)
+
+    def test_stale_if_range_serves_whole_file(self):
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.getvalue(), self.content)
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-sendfile')
+    def test_x_sendfile(self):
+        response = self.get(HTTP_RANGE='bytes=0-9')
+        # The web server sends the body and handles the range
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Sendfile'], self.path)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+
+class DuplicateReportConcurrencyTests(TransactionTestCase):
+    """
+    Simultaneous reports of one spot, each on its own thread and database
+    connection: exactly one complaint is created and no vote is lost.
+    """
+
+    threads = 8
+    reports = 32
+
+    def report(self, i, barrier):
+        try:
+            barrier.wait(timeout=10)
+        except threading.BrokenBarrierError:
+            pass
+        try:
+            # A different citizen (IP) per report, so the spam throttles stay out of it,
+            # and a few meters of jitter around the same pile
+            client = APIClient(REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}')
+            response = client.post('/api/complaints/', {
+                'location_coords': f'{11.0168 + random.uniform(-1e-5, 1e-5)},76.9558',
+                'location_address': '7, Cross Cut Road, Coimbatore',
+                'complainant_name': f'Citizen {i}',
+            })
+            return response.status_code
+        finally:
+            connection.close()
+
+    def test_simultaneous_reports(self):
+        barrier = threading.Barrier(self.threads)
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            statuses = list(pool.map(self.report, range(self.reports), [barrier] * self.reports))
+        
+        self.assertEqual(statuses.count(201), 1, statuses)
+        self.assertEqual(statuses.count(200), self.reports - 1, statuses)
+        complaint = Complaint.objects.get()
+        self.assertEqual(complaint.urgency_level, self.reports)
+
+
+class ComplaintSequenceConcurrencyTests(TransactionTestCase):
+    """Concurrent reservations of complaint IDs for a new day are gap-free and never overlap."""
+
+    threads = 8
+    calls = 40
+
+    def reserve(self, i, barrier):
+        try:
+            barrier.wait(timeout=10)
+        except threading.BrokenBarrierError:
+            pass
+        try:
+            return ComplaintSequence.reserve_complaint_ids(self.day, 1 + i % 3)
+        finally:
+            connection.close()
+
+    def test_concurrent_reservations(self):
+        self.day = timezone.localdate()
+        barrier = threading.Barrier(self.threads)
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            batches = list(pool.map(self.reserve, range(self.calls), [barrier] * self.calls))
+        
+        total = sum(1 + i % 3 for i in range(self.calls))
+        issued = sorted(complaint_id for batch in batches for complaint_id in batch)
+        self.assertEqual(issued, [f'CC-{self.day:%Y%m%d}-{value:06d}' for value in range(1, total + 1)])
+        # Each call's IDs are consecutive
+        for batch in batches:
+            first = int(batch[0].rsplit('-', 1)[1])
+            self.assertEqual(batch, [f'CC-{self.day:%Y%m%d}-{value:06d}' for value in range(first, first + len(batch))])
+        self.assertEqual(ComplaintSequence.objects.get(day=self.day).last_value, total)
+
+
+class LocationLockTests(TestCase):
+    """lock_location's PostgreSQL advisory keys, checked without a PostgreSQL server."""
+
+    def advisory_keys(self, *args):
+        fake = mock.MagicMock(vendor='postgresql')
+        cursor = fake.cursor.return_value.__enter__.return_value
+        with mock.patch('api.locking.connection', fake):
+            lock_location(*args)
+        return [call.args[1][0] for call in cursor.execute.call_args_list]
+
+    def test_reports_within_the_radius_share_a_lock(self):
+        # About 140 m apart: a photo duplicate, though not a nearby one
+        first = self.advisory_keys(11.0168, 76.9558, PHOTO_DUPLICATE_RADIUS, '7, Cross Cut Road')
+        second = self.advisory_keys(11.0180, 76.9562, PHOTO_DUPLICATE_RADIUS, '9, Avinashi Road')
+        self.assertTrue(set(first) & set(second))
+        self.assertEqual(first, sorted(first))
+
+    def test_same_address_without_coordinates_shares_a_lock(self):
+        first = self.advisory_keys(None, None, PHOTO_DUPLICATE_RADIUS, '7, Cross Cut Road')
+        second = self.advisory_keys(None, None, PHOTO_DUPLICATE_RADIUS, '7, CROSS CUT ROAD')
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first, second)
+
+
+class ThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_forwarded_for_does_not_reset_the_client_limit(self):
+        client = APIClient(REMOTE_ADDR='10.1.2.3')
+        statuses = [
+            client.post('/api/complaints/', {
+                'location_coords': '11.0168,76.9558',
+                'location_address': '7, Cross Cut Road, Coimbatore',
+            }, HTTP_X_FORWARDED_FOR=f'192.0.2.{i}').status_code
+            for i in range(6)
+        ]
+        # complaint_spot allows 5 reports of one spot per client an hour
+        self.assertEqual(statuses, [201, 200, 200, 200, 200, 429])
+
+
+class BulkActionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = User.objects.create_user('officer', password='x', role='OFFICER')
+        cls.collectors = [
+            User.objects.create_user(f'collector{i}', password='x', role='COLLECTOR') for i in range(3)
+        ]
+        cls.complaints = [
+            Complaint.objects.create(location_coords=f'11.{i:04d},76.9558', location_address=f'{i}, Town Hall')
+            for i in range(40)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.officer)
+
+    def bulk_assign(self, complaints):
+        items = [{'id': c.pk, 'collector_id': self.collectors[i % 3].pk} for i, c in enumerate(complaints)]
+        items += [{'id': 999999, 'collector_id': self.collectors[0].pk},
+                  {'id': complaints[0].pk, 'collector_id': 999999}]
+        return self.client.post('/api/complaints/bulk/assign/', {'items': items}, format='json')
+
+    def test_assign(self):
+        response = self.bulk_assign(self.complaints[:10])
+        self.assertEqual(response.data['updated'], 10)
+        self.assertEqual(
+            [r.get('error') for r in response.data['results'][-2:]], ['Complaint not found', 'Collector not found']
+        )
+        self.assertEqual(
+            Complaint.objects.filter(status='ASSIGNED', assigned_by=self.officer).count(), 10
+        )
+
+    def test_query_count_does_not_grow_with_items(self):
+        with CaptureQueriesContext(connection) as few:
+            self.bulk_assign(self.complaints[:5])
+        with CaptureQueriesContext(connection) as many:
+            self.bulk_assign(self.complaints[5:])
+        self.assertEqual(len(few), len(many))
+
+    def test_reject(self):
+        response = self.client.post('/api/complaints/bulk/reject/', {
+            'items': [{'id': c.pk, 'reason': 'Already cleared'} for c in self.complaints[:3]],
+        }, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(Complaint.objects.filter(status='REJECTED', rejected_reason='Already cleared').count(), 3)
+
+
+@unittest.skipIf(utils.np is None, 'NumPy is not installed')
+class HaversineBatchTests(SimpleTestCase):
+    """The NumPy batch distances match the pure-Python fallback."""
+
+    def test_matrix_matches_fallback(self):
+        rng = random.Random(5)
+        points_a = [(11 + rng.random() / 10, 76.9 + rng.random() / 10) for _ in range(20)]
+        # Same spot, antipode, poles and the antimeridian, where rounding bites
+        points_b = points_a[:3] + [(-11.05, -103.05), (90, 0), (-90, 0), (0, 179.9999), (0, -179.9999)]
+        matrix = haversine_matrix(points_a, points_b)
+        self.assertEqual(matrix.shape, (20, 8))
+        
+        with mock.patch.object(utils, 'np', None):
+            expected = haversine_matrix(points_a, points_b)
+            nearest = utils.nearest_k(11.05, 76.95, points_a, k=5)
+        for row, expected_row in zip(matrix.tolist(), expected):
+            for distance, expected_distance in zip(row, expected_row):
+                # Within a millimetre; the formulas differ near the antipode
+                self.assertAlmostEqual(distance, expected_distance, delta=1e-3)
+        self.assertEqual(utils.nearest_k(11.05, 76.95, points_a, k=5), nearest)
+
+
+class DispatchPlanTests(TestCase):
+    """plan_dispatch's greedy matching: most urgent first, nearest collector with capacity."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.north = User.objects.create_user('north', password='x', role='COLLECTOR', home_latitude=11.05, home_longitude=76.95)
+        cls.south = User.objects.create_user('south', password='x', role='COLLECTOR', home_latitude=11.0, home_longitude=76.95)
+        User.objects.create_user('away', password='x', role='COLLECTOR', is_active=False)
+        reports = [
+            ('south-1', '11.0010,76.9500', 1),
+            ('south-5', '11.0001,76.9500', 5),
+            ('north-1', '11.0490,76.9500', 1),
+            ('south-3', '11.0002,76.9501', 3),
+            ('south-2', '11.0003,76.9502', 2),
+            ('nowhere', '', 4),
+        ]
+        cls.complaints = {
+            address: Complaint.objects.create(location_coords=coords, location_address=address, urgency_level=urgency)
+            for address, coords, urgency in reports
+        }
+        # Already assigned: not planned, but counts towards south's load
+        Complaint.objects.create(location_coords='11.0,76.95', location_address='held', status='ASSIGNED', assigned_to=cls.south)
+
+    def test_plan(self):
+        with self.assertNumQueries(3):
+            plan = plan_dispatch(load_penalty=500, max_open=3)
+        
+        planned = [(item['id'], item['collector_username']) for item in plan['assignments']]
+        self.assertEqual(planned, [
+            (self.complaints['south-5'].pk, 'south'),
+            (self.complaints['south-3'].pk, 'south'),
+            # South is full now
+            (self.complaints['south-2'].pk, 'north'),
+            (self.complaints['south-1'].pk, 'north'),
+            (self.complaints['north-1'].pk, 'north'),
+        ])
+        self.assertAlmostEqual(plan['assignments'][0]['distance_meters'], 11.1, delta=0.1)
+        self.assertEqual(plan['unassigned'], [
+            {'id': self.complaints['nowhere'].pk, 'complaint_id': self.complaints['nowhere'].complaint_id,
+             'reason': 'No coordinates'},
+        ])
+        # Nothing is written
+        self.assertEqual(Complaint.objects.filter(assigned_to__isnull=True).count(), 6)
+        
+        with mock.patch('api.dispatch.np', None), mock.patch.object(utils, 'np', None):
+            self.assertEqual(plan_dispatch(load_penalty=500, max_open=3), plan)
+
+    def test_no_capacity(self):
+        plan = plan_dispatch(collectors=User.objects.filter(pk=self.north.pk), max_open=1)
+        self.assertEqual([item['id'] for item in plan['assignments']], [self.complaints['south-5'].pk])
+        self.assertEqual(
+            [item['reason'] for item in plan['unassigned']],
+            ['No coordinates', 'No collector capacity', 'No collector capacity', 'No collector capacity', 'No collector capacity'],
+        )
+
+
+class RouteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.collector = User.objects.create_user('collector', password='x', role='COLLECTOR')
+        rng = random.Random(7)
+        for i in range(12):
+            Complaint.objects.create(
+                location_coords=f'{11 + rng.random() / 20:.5f},{76.95 + rng.random() / 20:.5f}',
+                location_address=f'{i}, Avinashi Road', urgency_level=rng.randint(1, 5),
+                status='ASSIGNED', assigned_to=cls.collector,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_two_opt_never_worsens_the_route(self):
+        rng = random.Random(3)
+        points = [(11 + rng.random() / 10, 76.9 + rng.random() / 10) for _ in range(60)]
+        matrix = haversine_matrix(points, points)
+        matrix = matrix.tolist() if hasattr(matrix, 'tolist') else matrix
+        deadlines = [None] + [rng.choice([None, 30, 90]) for _ in range(59)]
+        order = list(range(1, 60))
+        improved = two_opt(order, matrix, deadlines)
+        self.assertEqual(sorted(improved), order)
+        self.assertLess(route_cost(improved, matrix, deadlines)[0], route_cost(order, matrix, deadlines)[0])
+
+    def test_nearby_starts_share_the_cached_route(self):
+        first = collector_route(self.collector, (11.02001, 76.96001))
+        second = collector_route(self.collector, (11.02012, 76.95994))
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+
+    @override_settings(ROUTE_MAX_STOPS=5)
+    def test_only_the_most_urgent_stops_are_routed(self):
+        route = collector_route(self.collector, (11.02, 76.96))
+        self.assertTrue(route['truncated'])
+        self.assertEqual(len(route['stops']), 5)
+        routed = sorted(stop['urgency_level'] for stop in route['stops'])
+        self.assertEqual(routed, sorted(Complaint.objects.values_list('urgency_level', flat=True))[-5:])
+
+
+class EscalationClockTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = User.objects.create_user('officer', password='x', role='OFFICER')
+        cls.collector = User.objects.create_user('collector', password='x', role='COLLECTOR')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.officer)
+        self.complaint = Complaint.objects.create(
+            location_coords='11.0168,76.9558', location_address='7, Cross Cut Road', urgency_level=3,
+        )
+        # An old complaint, long overdue
+        self.overdue = timezone.now() - timedelta(days=2)
+        Complaint.objects.filter(pk=self.complaint.pk).update(created_at=self.overdue, escalate_at=self.overdue)
+
+    def assertClockRestarted(self, complaint):
+        complaint.refresh_from_db()
+        expected = timezone.now() + timedelta(hours=sla_hours(complaint.urgency_level))
+        self.assertAlmostEqual(complaint.escalate_at, expected, delta=timedelta(minutes=1))
+        self.assertFalse(due_complaints().filter(pk=complaint.pk).exists())
+
+    def test_new_complaints_escalate_16_hours_after_creation(self):
+        for urgency in (1, 5, 10):
+            complaint = Complaint.objects.create(
+                location_coords='11.0168,76.9558', location_address='7, Cross Cut Road', urgency_level=urgency,
+            )
+            self.assertAlmostEqual(
+                complaint.escalate_at, complaint.created_at + timedelta(hours=16), delta=timedelta(seconds=1)
+            )
+
+    def test_assign_keeps_the_deadline_by_default(self):
+        self.client.post(f'/api/complaints/{self.complaint.pk}/assign/', {'collector_id': self.collector.pk})
+        self.complaint.refresh_from_db()
+        self.assertEqual(self.complaint.escalate_at, self.overdue)
+        self.assertTrue(due_complaints().filter(pk=self.complaint.pk).exists())
+
+    @override_settings(ESCALATION_RESTART_ON_ASSIGN=True)
+    def test_assign_restarts_the_clock(self):
+        self.client.post(f'/api/complaints/{self.complaint.pk}/assign/', {'collector_id': self.collector.pk})
+        self.assertClockRestarted(self.complaint)
+
+    @override_settings(ESCALATION_RESTART_ON_ASSIGN=True)
+    def test_bulk_assign_restarts_the_clock(self):
+        self.client.post('/api/complaints/bulk/assign/', {
+            'items': [{'id': self.complaint.pk, 'collector_id': self.collector.pk}],
+        }, format='json')
+        self.assertClockRestarted(self.complaint)
+
+    @override_settings(ESCALATION_RESTART_ON_ASSIGN=True)
+    def test_dispatch_restarts_the_clock(self):
+        apply_dispatch([{'id': self.complaint.pk, 'collector_id': self.collector.pk}])
+        self.assertClockRestarted(self.complaint)
+
+    def test_other_saves_keep_the_deadline(self):
+        complaint = Complaint.objects.get(pk=self.complaint.pk)
+        complaint.location_address = '9, Cross Cut Road'
+        complaint.save()
+        complaint.refresh_from_db()
+        self.assertEqual(complaint.escalate_at, self.overdue)
+
+    @override_settings(ESCALATION_SLA_HOURS=((5, 4), (3, 8), (1, 16)))
+    def test_duplicate_moves_the_deadline_by_the_sla_difference(self):
+        restarted = timezone.now() + timedelta(hours=1)
+        Complaint.objects.filter(pk=self.complaint.pk).update(
+            created_at=timezone.now(), urgency_level=2, escalate_at=restarted
+        )
+        APIClient().post('/api/complaints/', {
+            'location_coords': '11.0168,76.9558', 'location_address': '7, Cross Cut Road',
+        })
+        self.complaint.refresh_from_db()
+        self.assertEqual(self.complaint.urgency_level, 3)
+        self.assertEqual(self.complaint.escalate_at, restarted + timedelta(hours=sla_hours(3) - sla_hours(2)))
+
+
+class ServerTimingTests(TestCase):
+
+    @override_settings(DEBUG=False)
+    def test_header_is_off_outside_debug(self):
+        with self.settings():
+            del settings.SERVER_TIMING_HEADER
+            response = APIClient().get('/api/stats/')
+        self.assertNotIn('Server-Timing', response.headers)
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_header_when_enabled(self):
+        response = APIClient().get('/api/stats/')
+        self.assertIn('queries', response.headers['Server-Timing'])
+
+
+class EventStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = User.objects.create_user('officer', password='x', role='OFFICER')
+        cls.collectors = [User.objects.create_user(f'collector{i}', password='x', role='COLLECTOR') for i in range(2)]
+        cls.complaint = Complaint.objects.create(location_coords='11.0168,76.9558', location_address='7, Town Hall')
+
+    def assign(self, collector):
+        client = APIClient()
+        client.force_authenticate(self.officer)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/complaints/{self.complaint.pk}/assign/', {'collector_id': collector.pk})
+
+    def test_staff_stream_receives_committed_changes(self):
+        self.client.force_login(self.officer)
+        response = self.client.get('/api/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = iter(response.streaming_content)
+        self.assertEqual(next(frames), b'retry: 5000\n\n')
+        self.assign(self.collectors[0])
+        frame = next(frames).decode()
+        self.assertTrue(frame.startswith('event: assigned\n'))
+        self.assertIn(f'"id": {self.complaint.pk}', frame)
+        response.close()
+        self.assertFalse(bus._subscribers)
+
+    def test_collectors_only_see_their_complaints(self):
+        mine, other = (bus.subscribe(collector) for collector in self.collectors)
+        try:
+            self.assign(self.collectors[0])
+            self.assertEqual(mine.queue.get_nowait()['type'], 'assigned')
+            self.assertTrue(other.queue.empty())
+        finally:
+            bus.unsubscribe(mine)
+            bus.unsubscribe(other)
+
+    def test_overflow_asks_for_resync(self):
+        subscriber = bus.subscribe(self.officer, maxsize=1)
+        frames = stream_events(subscriber, keepalive=0.01)
+        next(frames)
+        for _ in range(2):
+            self.assign(self.collectors[0])
+        self.assertEqual(next(frames), 'event: resync\ndata: {}\n\n')
+        self.assertTrue(next(frames).startswith('event: assigned\n'))
+        self.assertEqual(next(frames), ': keepalive\n\n')
+        frames.close()
+        self.assertNotIn(subscriber, bus._subscribers)
+
+    def test_anonymous_is_refused(self):
+        self.assertEqual(self.client.get('/api/events/').status_code, 401)
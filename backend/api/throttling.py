@@ -0,0 +1,123 @@
+"""
+Rate limiting for City Care API.
+
+Sliding-window counters kept in the Django cache: each key holds one integer
+per fixed window, and the current rate is estimated from the current and
+previous windows. A check is a single get_many plus an incr, independent of
+how many requests were made, and never touches the complaints table. Point
+CACHES at Redis/Memcached to share limits between worker processes.
+"""
+
+import time
+
+from django.core.cache import cache
+from rest_framework.throttling import SimpleRateThrottle
+
+from .utils import grid_cell, parse_coords
+
+
+class SlidingWindowLimiter:
+    """O(1) sliding-window rate limiter over a Django cache backend."""
+    
+    def __init__(self, cache_backend=cache, timer=time.time):
+        self.cache = cache_backend
+        self.timer = timer
+    
+    def hit(self, key, limit, duration):
+        """
+        Record a request for `key` if it is within `limit` per `duration`
+        seconds. Returns (allowed, wait_seconds).
+        """
+        now = self.timer()
+        window = int(now // duration)
+        current_key = f'rl:{key}:{window}'
+        previous_key = f'rl:{key}:{window - 1}'
+        
+        counts = self.cache.get_many([current_key, previous_key])
+        current = counts.get(current_key, 0)
+        previous = counts.get(previous_key, 0)
+        elapsed = now - window * duration
+        weight = 1 - elapsed / duration
+        
+        if previous * weight + current >= limit:
+            return False, self._wait(limit, duration, elapsed, current, previous)
+        
+        # Keep each window long enough to serve as the next one's "previous"
+        if not self.cache.add(current_key, 1, timeout=int(duration * 2) + 1):
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                self.cache.set(current_key, 1, timeout=int(duration * 2) + 1)
+        return True, None
+    
+    def _wait(self, limit, duration, elapsed, current, previous):
+        if current >= limit or not previous:
+            # Nothing frees up before the next window starts
+            return duration - elapsed
+        # Solve previous * (1 - t / duration) + current < limit for t
+        t = duration * (1 - (limit - current) / previous)
+        return max(t - elapsed, 0.0)
+
+
+limiter = SlidingWindowLimiter()
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    DRF throttle using SlidingWindowLimiter. Subclasses set `scope` (rate
+    comes from DEFAULT_THROTTLE_RATES) and may override get_cache_key.
+    """
+    
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'{self.scope}:{ident}'
+    
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        allowed, self._wait = limiter.hit(key, self.num_requests, self.duration)
+        return allowed
+    
+    def wait(self):
+        return self._wait
+
+
+class LoginThrottle(SlidingWindowThrottle):
+    """Login attempts per client IP."""
+    scope = 'login'
+    
+    def get_cache_key(self, request, view):
+        return f'{self.scope}:ip:{self.get_ident(request)}'
+
+
+class ActionThrottle(SlidingWindowThrottle):
+    """Assign/resolve/reject/escalate actions per user (or IP)."""
+    scope = 'actions'
+
+
+class ComplaintCreateThrottle(SlidingWindowThrottle):
+    """Complaint submissions per user (or IP), anywhere."""
+    scope = 'complaint_create'
+
+
+class ComplaintSpotThrottle(SlidingWindowThrottle):
+    """
+    Complaint submissions per user (or IP) at one spatial grid cell; this
+    is the spam check for repeated reports of the same spot.
+    """
+    scope = 'complaint_spot'
+    
+    def get_cache_key(self, request, view):
+        point = parse_coords(request.data.get('location_coords'))
+        if not point:
+            try:
+                point = float(request.data['latitude']), float(request.data['longitude'])
+            except (KeyError, TypeError, ValueError):
+                return None
+        return f'{super().get_cache_key(request, view)}:{grid_cell(*point)}'
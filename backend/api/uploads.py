@@ -0,0 +1,122 @@
+"""
+Streaming upload handling for complaint photos.
+
+Uploads are written chunk by chunk to FILE_UPLOAD_TEMP_DIR (BASE_DIR/upload_tmp,
+on MEDIA_ROOT's filesystem but outside it), so saving them to storage is a
+rename and no upload is held in memory. Byte and pixel caps are enforced while the upload
+streams in, using only the image header.
+"""
+
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+from PIL import Image, UnidentifiedImageError
+from rest_framework import serializers
+
+ALLOWED_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF', 'HEIF', 'MPO')
+
+# How much of the file to buffer while looking for the image header
+HEADER_BUDGET_BYTES = 256 * 1024
+
+
+class UploadRejected(MultiPartParserError):
+    """Raised mid-stream when an upload breaks a size limit."""
+
+
+def max_upload_bytes():
+    return getattr(settings, 'MAX_UPLOAD_BYTES', 10 * 1024 * 1024)
+
+
+def max_upload_pixels():
+    return getattr(settings, 'MAX_UPLOAD_PIXELS', 40_000_000)
+
+
+def read_image_header(data):
+    """
+    Return (format, (width, height)) from the start of an image file, or
+    None if the header is not complete yet. Image.open only parses headers;
+    no pixel data is decoded.
+    """
+    try:
+        with Image.open(BytesIO(data)) as image:
+            return image.format, image.size
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        return None
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream uploads to disk, rejecting them as soon as they exceed
+    MAX_UPLOAD_BYTES or their header declares more than MAX_UPLOAD_PIXELS.
+    The parsed header is attached to the file as `image_format`/`image_size`.
+    """
+    
+    def new_file(self, *args, **kwargs):
+        os.makedirs(settings.FILE_UPLOAD_TEMP_DIR, exist_ok=True)
+        super().new_file(*args, **kwargs)
+        self.bytes_received = 0
+        self.header = bytearray()
+        self.image_info = None
+    
+    def reject(self, message):
+        self.upload_interrupted()
+        raise UploadRejected(message)
+    
+    def receive_data_chunk(self, raw_data, start):
+        self.bytes_received += len(raw_data)
+        if self.bytes_received > max_upload_bytes():
+            self.reject(f'{self.file_name} is larger than {max_upload_bytes()} bytes')
+        
+        if self.image_info is None and len(self.header) < HEADER_BUDGET_BYTES:
+            self.header += raw_data
+            self.image_info = read_image_header(bytes(self.header))
+            if self.image_info:
+                width, height = self.image_info[1]
+                if width * height > max_upload_pixels():
+                    self.reject(f'{self.file_name} is {width}x{height}; at most {max_upload_pixels()} pixels are allowed')
+                self.header = bytearray()
+        
+        self.file.write(raw_data)
+    
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if self.image_info:
+            file.image_format, file.image_size = self.image_info
+        return file
+
+
+class HeaderValidatedImageField(serializers.FileField):
+    """
+    Image upload field that validates format and pixel count from the header
+    alone instead of fully decoding the image like serializers.ImageField.
+    """
+    
+    default_error_messages = {
+        'invalid_image': 'Upload a valid image. The file you uploaded was either not an image or a corrupted image.',
+        'too_many_pixels': 'Image is too large ({width}x{height}).',
+    }
+    
+    def to_internal_value(self, data):
+        file = super().to_internal_value(data)
+        
+        image_format = getattr(file, 'image_format', None)
+        image_size = getattr(file, 'image_size', None)
+        if image_format is None:
+            # Not parsed during the upload (e.g. a test client file)
+            try:
+                with Image.open(file) as image:
+                    image_format, image_size = image.format, image.size
+            except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+                self.fail('invalid_image')
+            finally:
+                file.seek(0)
+        
+        if image_format not in ALLOWED_IMAGE_FORMATS:
+            self.fail('invalid_image')
+        width, height = image_size
+        if width * height > max_upload_pixels():
+            self.fail('too_many_pixels', width=width, height=height)
+        return file
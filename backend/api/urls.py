@@ -18,12 +18,26 @@ urlpatterns = [
     path('login/', views.LoginView.as_view(), name='login'),
     path('logout/', views.LogoutView.as_view(), name='logout'),
     
+    # Bulk Complaint Actions (before the per-complaint routes, which would match "bulk")
+    path('complaints/bulk/assign/', views.BulkComplaintActionView.as_view(bulk_action='assign'),
+         name='bulk-assign-complaints'),
+    path('complaints/bulk/resolve/', views.BulkComplaintActionView.as_view(bulk_action='resolve'),
+         name='bulk-resolve-complaints'),
+    path('complaints/bulk/reject/', views.BulkComplaintActionView.as_view(bulk_action='reject'),
+         name='bulk-reject-complaints'),
+    
     # Complaint Actions
     path('complaints/<str:complaint_id>/assign/', views.AssignComplaintView.as_view(), name='assign-complaint'),
     path('complaints/<str:complaint_id>/resolve/', views.ResolveComplaintView.as_view(), name='resolve-complaint'),
     path('complaints/<str:complaint_id>/reject/', views.RejectComplaintView.as_view(), name='reject-complaint'),
     
+    # Automatic assignment
+    path('dispatch/', views.AutoDispatchView.as_view(), name='auto-dispatch'),
+    
     # Simulation & Stats
     path('simulate-timeout/', views.SimulateTimeoutView.as_view(), name='simulate-timeout'),
     path('stats/', views.dashboard_stats, name='dashboard-stats'),
+    
+    # Live updates
+    path('events/', views.complaint_events, name='complaint-events'),
 ]
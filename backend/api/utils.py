@@ -2,15 +2,27 @@
 Utility functions for City Care.
 """
 
+import heapq
 import math
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batch functions fall back to pure Python
+    np = None
+
+EARTH_RADIUS_METERS = 6371000
+
+# Size of one spatial grid cell in degrees (~55m of latitude).
+GRID_CELL_DEGREES = 0.0005
+METERS_PER_DEGREE = EARTH_RADIUS_METERS * math.pi / 180
+
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
     Calculate the great circle distance between two points on Earth.
     Returns distance in meters.
     """
-    R = 6371000  # Earth's radius in meters
+    R = EARTH_RADIUS_METERS
     
     phi1 = math.radians(lat1)
     phi2 = math.radians(lat2)
@@ -26,6 +38,71 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     return R * c
 
 
+def haversine_many(lat, lng, points):
+    """
+    Distances in meters from one point to each of N (lat, lng) points.
+    Returns a NumPy array when NumPy is installed, otherwise a list.
+    """
+    if np is None:
+        return [haversine_distance(lat, lng, p_lat, p_lng) for p_lat, p_lng in points]
+    
+    coords = np.asarray(points, dtype=float).reshape(-1, 2)
+    return haversine_matrix([(lat, lng)], coords)[0]
+
+
+def haversine_matrix(points_a, points_b):
+    """
+    N x M matrix of distances in meters between two lists of (lat, lng) points.
+    Returns a NumPy array when NumPy is installed, otherwise a list of lists.
+    """
+    if np is None:
+        return [
+            [haversine_distance(a_lat, a_lng, b_lat, b_lng) for b_lat, b_lng in points_b]
+            for a_lat, a_lng in points_a
+        ]
+    
+    a = np.radians(np.asarray(points_a, dtype=float).reshape(-1, 2))
+    b = np.radians(np.asarray(points_b, dtype=float).reshape(-1, 2))
+    phi1 = a[:, 0][:, np.newaxis]
+    phi2 = b[:, 0][np.newaxis, :]
+    delta_phi = phi2 - phi1
+    delta_lambda = b[:, 1][np.newaxis, :] - a[:, 1][:, np.newaxis]
+    
+    h = (np.sin(delta_phi / 2) ** 2 +
+         np.cos(phi1) * np.cos(phi2) *
+         np.sin(delta_lambda / 2) ** 2)
+    
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def nearest_k(lat, lng, points, k=1):
+    """
+    Indices of the k points closest to (lat, lng), nearest first.
+    """
+    distances = haversine_many(lat, lng, points)
+    k = min(k, len(distances))
+    if k <= 0:
+        return []
+    
+    if np is None:
+        return heapq.nsmallest(k, range(len(distances)), key=distances.__getitem__)
+    
+    candidates = np.argpartition(distances, k - 1)[:k]
+    return candidates[np.argsort(distances[candidates], kind='stable')].tolist()
+
+
+def within_radius(lat, lng, points, radius_meters=50):
+    """
+    Indices of the points within radius_meters of (lat, lng), in input order.
+    """
+    distances = haversine_many(lat, lng, points)
+    
+    if np is None:
+        return [i for i, distance in enumerate(distances) if distance <= radius_meters]
+    
+    return np.flatnonzero(distances <= radius_meters).tolist()
+
+
 def parse_coords(coords_string):
     """
     Parse 'lat,lng' string to tuple of floats.
@@ -52,3 +129,59 @@ def is_within_radius(coords1, coords2, radius_meters=50):
     
     distance = haversine_distance(point1[0], point1[1], point2[0], point2[1])
     return distance <= radius_meters
+
+
+def hamming_distance(hash1, hash2):
+    """
+    Number of differing bits between two hex-encoded hashes.
+    """
+    return bin(int(hash1, 16) ^ int(hash2, 16)).count('1')
+
+
+def bounding_box(lat, lng, radius_meters=50):
+    """
+    Return (min_lat, min_lng, max_lat, max_lng) enclosing the given radius.
+    Useful as an indexed SQL prefilter before an exact distance check.
+    """
+    delta_lat = radius_meters / METERS_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    delta_lng = radius_meters / (METERS_PER_DEGREE * cos_lat)
+    return lat - delta_lat, lng - delta_lng, lat + delta_lat, lng + delta_lng
+
+
+def grid_cell(lat, lng):
+    """
+    Return the spatial grid cell key ("row:col") containing a point.
+    """
+    row = math.floor(lat / GRID_CELL_DEGREES)
+    col = math.floor(lng / GRID_CELL_DEGREES)
+    return f"{row}:{col}"
+
+
+def grid_cell_for_coords(coords_string):
+    """
+    Return the grid cell key for a 'lat,lng' string, or None if invalid.
+    """
+    point = parse_coords(coords_string)
+    if not point:
+        return None
+    return grid_cell(point[0], point[1])
+
+
+def cells_within_radius(lat, lng, radius_meters=50):
+    """
+    Return every grid cell key that may contain points within the radius.
+    Candidates from these cells still need an exact distance check.
+    """
+    min_lat, min_lng, max_lat, max_lng = bounding_box(lat, lng, radius_meters)
+    
+    min_row = math.floor(min_lat / GRID_CELL_DEGREES)
+    max_row = math.floor(max_lat / GRID_CELL_DEGREES)
+    min_col = math.floor(min_lng / GRID_CELL_DEGREES)
+    max_col = math.floor(max_lng / GRID_CELL_DEGREES)
+    
+    return [
+        f"{row}:{col}"
+        for row in range(min_row, max_row + 1)
+        for col in range(min_col, max_col + 1)
+    ]
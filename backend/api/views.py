@@ -1,24 +1,50 @@
+import logging
+from collections import namedtuple
 from datetime import timedelta
 # from bson.objectid import ObjectId # Removed
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.contrib.auth import authenticate, login, logout
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, action
+from rest_framework.exceptions import Throttled, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 
-from .models import User, Complaint
+from .conditional import conditional_response, latest_change_etag, make_etag
+from .dispatch import apply_dispatch, plan_dispatch
+from .escalation import escalate, escalate_due, rescheduled_deadline, restart_escalation
+from .events import bus, publish_complaint_event, stream_events
+from .imaging import (
+    PHOTO_DUPLICATE_RADIUS, PHOTO_HASH_MAX_DISTANCE, perceptual_hash, schedule_image_processing
+)
+from .locking import lock_complaints_for_update, lock_location
+from .models import User, Complaint, ComplaintTombstone
 from .serializers import (
     UserSerializer, UserCreateSerializer,
-    ComplaintSerializer, ComplaintCreateSerializer,
-    AssignComplaintSerializer, ResolveComplaintSerializer, RejectComplaintSerializer
+    ComplaintSerializer, LeanComplaintSerializer, ComplaintCreateSerializer,
+    AssignComplaintSerializer, ResolveComplaintSerializer, RejectComplaintSerializer,
+    BulkAssignSerializer, BulkResolveSerializer, BulkRejectSerializer, AutoDispatchSerializer
 )
-from .utils import is_within_radius
+from .pagination import ComplaintKeysetPagination
+from .stats import get_complaint_stats, invalidate_complaint_stats
+from .routing import collector_route
+from .sync import changes_since
+from .throttling import ActionThrottle, ComplaintCreateThrottle, ComplaintSpotThrottle, LoginThrottle
+from .utils import hamming_distance, haversine_distance, parse_coords
+
+logger = logging.getLogger(__name__)
+
+# Reports within this many meters of an open complaint are duplicates of it
+DUPLICATE_RADIUS = 50
 
 # MongoDB methods removed
 
@@ -38,6 +64,17 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = UserSerializer(collectors, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def route(self, request, pk=None):
+        """Optimised visiting order over this collector's open complaints."""
+        collector = self.get_object()
+        start = None
+        if request.query_params.get('start'):
+            start = parse_coords(request.query_params['start'])
+            if start is None:
+                raise ValidationError({'start': 'Expected "lat,lng".'})
+        return Response(collector_route(collector, start))
+    
     @action(detail=False, methods=['get'])
     def me(self, request):
         if request.user.is_authenticated:
@@ -50,6 +87,7 @@ class UserViewSet(viewsets.ModelViewSet):
 class LoginView(APIView):
     """Handle user login."""
     authentication_classes = []
+    throttle_classes = [LoginThrottle]
     
     def post(self, request):
         username = request.data.get('username')
@@ -91,9 +129,11 @@ class ComplaintViewSet(viewsets.ModelViewSet):
     """
     queryset = Complaint.objects.all()
     serializer_class = ComplaintSerializer
+    pagination_class = ComplaintKeysetPagination
     
     def get_queryset(self):
-        queryset = Complaint.objects.all()
+        # Join the users the serializer reads to avoid one query per row
+        queryset = Complaint.objects.select_related('complainant', 'assigned_to', 'assigned_by')
         status_filter = self.request.query_params.get('status')
         assigned_to = self.request.query_params.get('assigned_to')
         
@@ -102,18 +142,93 @@ class ComplaintViewSet(viewsets.ModelViewSet):
             
         if assigned_to:
             queryset = queryset.filter(assigned_to_id=assigned_to)
+        
+        # Map viewport filter: ?bbox=min_lat,min_lng,max_lat,max_lng
+        bbox = self.request.query_params.get('bbox')
+        if bbox:
+            try:
+                min_lat, min_lng, max_lat, max_lng = (float(v) for v in bbox.split(','))
+            except ValueError:
+                raise ValidationError({'bbox': 'Expected min_lat,min_lng,max_lat,max_lng'})
+            queryset = queryset.filter(
+                latitude__range=(min_lat, max_lat),
+                longitude__range=(min_lng, max_lng),
+            )
             
-        return queryset.order_by('-urgency_level', '-created_at')
+        return queryset.order_by('-urgency_level', '-created_at', '-id')
+    
+    def list(self, request, *args, **kwargs):
+        # Creates and edits move the latest updated_at, deletes the latest tombstone
+        etag = latest_change_etag(
+            request, (Complaint.objects.all(), 'updated_at'), (ComplaintTombstone.objects.all(), 'id')
+        )
+        return conditional_response(request, etag, lambda: super(ComplaintViewSet, self).list(request, *args, **kwargs))
+    
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            updated_at = Complaint.objects.filter(pk=kwargs.get('pk')).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            raise Http404
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        etag = make_etag(request.build_absolute_uri(), updated_at)
+        return conditional_response(request, etag, lambda: super(ComplaintViewSet, self).retrieve(request, *args, **kwargs))
+    
+    def get_throttles(self):
+        # Spam detection: per-client and per-client-per-spot submission limits
+        if self.action == 'create':
+            return [ComplaintCreateThrottle(), ComplaintSpotThrottle()]
+        return []
+    
+    def throttled(self, request, wait):
+        raise Throttled(wait, detail='Spam detected')
+    
+    def get_serializer_class(self):
+        # ?lean=1 skips per-field DRF overhead for large read-only lists
+        if self.action == 'list' and self.request.query_params.get('lean') in ('1', 'true'):
+            return LeanComplaintSerializer
+        return ComplaintSerializer
+    
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta sync: complaints created or changed since ?since=<watermark>,
+        the pks of deleted complaints, and the watermark for the next poll.
+        With `resync` set the watermark had expired and `changed` starts a
+        full sync: the client must drop the complaints it holds.
+        """
+        try:
+            limit = int(request.query_params.get('limit', 500))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'error': 'limit must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows, deleted, watermark, has_more, resync = changes_since(
+                request.query_params.get('since'), min(limit, 5000)
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'changed': ComplaintSerializer(rows, many=True, context={'request': request}).data,
+            'deleted': deleted,
+            'watermark': watermark,
+            'has_more': has_more,
+            'resync': resync,
+        })
     
     def create(self, request, *args, **kwargs):
         try:
-            print(f"FILES received: {request.FILES.keys()}")
-            print(f"DATA received: {request.data}")
+            logger.debug('Complaint submission: fields=%s files=%s',
+                         sorted(request.data.keys()), sorted(request.FILES.keys()))
             
             serializer = ComplaintCreateSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
             
             location_coords = serializer.validated_data.get('location_coords', '')
+            latitude = serializer.validated_data.get('latitude')
+            longitude = serializer.validated_data.get('longitude')
             location_address = serializer.validated_data.get('location_address', '')
             complainant_name = serializer.validated_data.get('complainant_name', '')
             
@@ -122,47 +237,76 @@ class ComplaintViewSet(viewsets.ModelViewSet):
             # Use Django's timezone
             now = timezone.now()
             
-            # Spam Detection
-            if complainant:
-                one_hour_ago = now - timedelta(hours=1)
-                recent_count = Complaint.objects.filter(
-                    complainant=complainant,
-                    created_at__gte=one_hour_ago,
-                    location_coords=location_coords
-                ).count()
-                
-                if recent_count >= 5:
-                    return Response({'error': 'Spam detected'}, status=429)
-
             # Duplicate/Urgency Detection
+            # Only complaints in the grid cells / bounding box around the new point
+            # (or with the same address) are candidates; the exact radius check
+            # runs on those. A near-identical photo of the same spot, a little
+            # further away, also counts.
+            image_before = serializer.validated_data.get('image_before')
+            phash = None
+            if image_before:
+                try:
+                    phash = perceptual_hash(image_before, jpeg_only=True)
+                except (OSError, ValueError):
+                    pass
+            
             twenty_four_hours_ago = now - timedelta(hours=24)
-            potential_duplicates = Complaint.objects.filter(
-                status__in=['PENDING', 'ASSIGNED'],
-                created_at__gte=twenty_four_hours_ago
-            )
             
-            for existing in potential_duplicates:
-                if (is_within_radius(existing.location_coords, location_coords, 50) or
-                    existing.location_address.lower() == location_address.lower()):
-                    
-                    # Increment Urgency
-                    existing.urgency_level += 1
-                    existing.save()
-                    
-                    return Response({
-                        'message': 'Duplicate found. Urgency increased.',
-                        'complaint': ComplaintSerializer(existing).data,
-                        'is_duplicate': True
-                    })
-
-            # Create New Complaint
-            complaint = Complaint.objects.create(
-                complainant=complainant,
-                complainant_name=complainant_name,
-                location_coords=location_coords,
-                location_address=location_address,
-                image_before=request.FILES.get('image_before')
-            )
+            # Check and increment/insert in one transaction, serialized against
+            # other reports near the same spot, so simultaneous reports of one
+            # pile neither create two complaints nor lose a vote.
+            with transaction.atomic():
+                # Over the furthest distance a report can match at, and its address
+                lock_location(latitude, longitude, max(DUPLICATE_RADIUS, PHOTO_DUPLICATE_RADIUS), location_address)
+                potential_duplicates = Complaint.objects.duplicate_candidates(
+                    latitude, longitude, location_address, twenty_four_hours_ago, DUPLICATE_RADIUS,
+                    photo_radius_meters=PHOTO_DUPLICATE_RADIUS if phash else None
+                ).select_for_update()
+                
+                for existing in potential_duplicates:
+                    distance = None
+                    if latitude is not None and existing.latitude is not None:
+                        distance = haversine_distance(existing.latitude, existing.longitude, latitude, longitude)
+                    is_near = distance is not None and distance <= DUPLICATE_RADIUS
+                    same_photo = (
+                        phash is not None and existing.image_before_phash and
+                        distance is not None and distance <= PHOTO_DUPLICATE_RADIUS and
+                        hamming_distance(existing.image_before_phash, phash) <= PHOTO_HASH_MAX_DISTANCE
+                    )
+                    if is_near or same_photo or existing.location_address.lower() == location_address.lower():
+                        
+                        # Increment Urgency atomically, touching only the changed columns.
+                        # The row is locked, so its deadline can follow the new urgency.
+                        Complaint.objects.filter(pk=existing.pk).update(
+                            urgency_level=F('urgency_level') + 1,
+                            escalate_at=rescheduled_deadline(
+                                existing.escalate_at, existing.urgency_level, existing.urgency_level + 1,
+                                existing.force_escalate,
+                            ),
+                            updated_at=timezone.now()
+                        )
+                        existing.refresh_from_db(fields=['urgency_level', 'escalate_at', 'updated_at'])
+                        publish_complaint_event('updated', [existing])
+                        
+                        return Response({
+                            'message': 'Duplicate found. Urgency increased.',
+                            'complaint': ComplaintSerializer(existing).data,
+                            'is_duplicate': True
+                        })
+
+                # Create New Complaint
+                complaint = Complaint.objects.create(
+                    complainant=complainant,
+                    complainant_name=complainant_name,
+                    location_coords=location_coords,
+                    latitude=latitude,
+                    longitude=longitude,
+                    location_address=location_address,
+                    image_before=image_before,
+                    image_before_phash=phash
+                )
+                publish_complaint_event('created', [complaint])
+            schedule_image_processing(complaint, 'image_before')
             
             return Response({
                 'message': 'Complaint submitted',
@@ -171,106 +315,267 @@ class ComplaintViewSet(viewsets.ModelViewSet):
             }, status=201)
             
         except Exception as e:
-            print(f"Error in create complaint: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception('Error in create complaint')
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+def _locked_complaint(complaint_id):
+    """
+    The complaint, locked for update, or None. Call inside transaction.atomic():
+    the lock is taken before the row is read and re-stamped, so a writer
+    queued behind another can't commit an updated_at older than a delta-sync
+    watermark already handed out.
+    """
+    lock_complaints_for_update()
+    try:
+        return Complaint.objects.select_for_update().get(id=complaint_id)
+    except (Complaint.DoesNotExist, ValueError):
+        return None
+
+
 class AssignComplaintView(APIView):
+    throttle_classes = [ActionThrottle]
+    
     def post(self, request, complaint_id):
-        try:
-            # complaint_id is the string ID "CC-..."? No, ModelViewSet uses PK (id) by default in URL
-            # but our frontend might be sending the _id string from Mongo times.
-            # Let's support PK lookup.
-            complaint = Complaint.objects.get(id=complaint_id)
-        except (Complaint.DoesNotExist, ValueError):
-             return Response({'error': 'Complaint not found'}, status=404)
-
         serializer = AssignComplaintSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        try:
-            collector = User.objects.get(id=serializer.validated_data['collector_id'])
-        except User.DoesNotExist:
-            return Response({'error': 'Collector not found'}, status=404)
-        
-        complaint.assigned_to = collector
-        complaint.assigned_by = request.user
-        complaint.status = 'ASSIGNED'
-        complaint.save()
+        with transaction.atomic():
+            # complaint_id is the string ID "CC-..."? No, ModelViewSet uses PK (id) by default in URL
+            # but our frontend might be sending the _id string from Mongo times.
+            # Let's support PK lookup.
+            complaint = _locked_complaint(complaint_id)
+            if complaint is None:
+                return Response({'error': 'Complaint not found'}, status=404)
+            
+            try:
+                collector = User.objects.get(id=serializer.validated_data['collector_id'])
+            except User.DoesNotExist:
+                return Response({'error': 'Collector not found'}, status=404)
+            
+            complaint.assigned_to = collector
+            complaint.assigned_by = request.user
+            complaint.status = 'ASSIGNED'
+            restart_escalation(complaint)
+            complaint.save()
+        publish_complaint_event('assigned', [complaint])
         
         return Response({'message': 'Assigned', 'complaint': ComplaintSerializer(complaint).data})
 
 
 class ResolveComplaintView(APIView):
+    throttle_classes = [ActionThrottle]
+    
     def post(self, request, complaint_id):
-        try:
-            complaint = Complaint.objects.get(id=complaint_id)
-        except Complaint.DoesNotExist:
-            return Response({'error': 'Complaint not found'}, status=404)
-            
-        image_file = request.FILES.get('image_after')
-        if image_file:
-            complaint.image_after = image_file
+        serializer = ResolveComplaintSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            complaint = _locked_complaint(complaint_id)
+            if complaint is None:
+                return Response({'error': 'Complaint not found'}, status=404)
             
-        complaint.status = 'RESOLVED'
-        complaint.save()
+            image_file = serializer.validated_data.get('image_after')
+            if image_file:
+                complaint.image_after = image_file
+                
+            complaint.status = 'RESOLVED'
+            complaint.save()
+            # Renditions of an earlier photo are already built
+            if image_file:
+                schedule_image_processing(complaint, 'image_after')
+        publish_complaint_event('resolved', [complaint])
         return Response({'message': 'Resolved'})
 
 
 class RejectComplaintView(APIView):
+    throttle_classes = [ActionThrottle]
+    
     def post(self, request, complaint_id):
-        try:
-            complaint = Complaint.objects.get(id=complaint_id)
-        except Complaint.DoesNotExist:
-            return Response({'error': 'Complaint not found'}, status=404)
-            
-        reason = request.data.get('reason')
-        complaint.status = 'REJECTED'
-        complaint.rejected_reason = reason
-        complaint.save()
+        with transaction.atomic():
+            complaint = _locked_complaint(complaint_id)
+            if complaint is None:
+                return Response({'error': 'Complaint not found'}, status=404)
+                
+            reason = request.data.get('reason')
+            complaint.status = 'REJECTED'
+            complaint.rejected_reason = reason
+            complaint.save()
+        publish_complaint_event('rejected', [complaint])
         return Response({'message': 'Rejected'})
 
 
+def _load_collectors(items):
+    return {'collectors': User.objects.in_bulk({item['collector_id'] for item in items})}
+
+
+def _bulk_assign(request, complaint, item, context):
+    collector = context['collectors'].get(item['collector_id'])
+    if collector is None:
+        return 'Collector not found'
+    complaint.assigned_to = collector
+    complaint.assigned_by = request.user if request.user.is_authenticated else None
+    complaint.status = 'ASSIGNED'
+    restart_escalation(complaint)
+
+
+def _bulk_resolve(request, complaint, item, context):
+    complaint.status = 'RESOLVED'
+
+
+def _bulk_reject(request, complaint, item, context):
+    complaint.status = 'REJECTED'
+    complaint.rejected_reason = item['reason']
+
+
+# One bulk action: its request serializer, the event it publishes, the
+# fields it writes, apply(request, complaint, item, context) returning an
+# error message to skip the item, and an optional load_context(items)
+# fetching lookup tables for all items at once
+BulkAction = namedtuple('BulkAction', 'serializer_class event_type update_fields apply load_context')
+
+BULK_ACTIONS = {
+    'assign': BulkAction(
+        BulkAssignSerializer, 'assigned', ['assigned_to', 'assigned_by', 'status', 'escalate_at'],
+        _bulk_assign, _load_collectors,
+    ),
+    'resolve': BulkAction(BulkResolveSerializer, 'resolved', ['status'], _bulk_resolve, None),
+    'reject': BulkAction(BulkRejectSerializer, 'rejected', ['status', 'rejected_reason'], _bulk_reject, None),
+}
+
+
+class BulkComplaintActionView(APIView):
+    """
+    Apply one action to many complaints in a single request: one query to
+    load them, one per lookup table, and a bulk_update, all in one
+    transaction. Responds with a result per item.
+    """
+    throttle_classes = [ActionThrottle]
+    bulk_action = None  # key of BULK_ACTIONS, passed to as_view()
+    
+    def post(self, request):
+        bulk_action = BULK_ACTIONS[self.bulk_action]
+        serializer = bulk_action.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['items']
+        
+        results = []
+        changed = {}
+        with transaction.atomic():
+            lock_complaints_for_update()
+            # After the lock: a writer queued behind another must not stamp
+            # its rows earlier than the rows that one committed
+            now = timezone.now()
+            complaints = Complaint.objects.select_for_update().in_bulk([item['id'] for item in items])
+            context = bulk_action.load_context(items) if bulk_action.load_context else {}
+            
+            for item in items:
+                complaint = complaints.get(item['id'])
+                if complaint is None:
+                    error = 'Complaint not found'
+                else:
+                    error = bulk_action.apply(request, complaint, item, context)
+                if error:
+                    results.append({'id': item['id'], 'ok': False, 'error': error})
+                    continue
+                complaint.updated_at = now
+                changed[complaint.pk] = complaint
+                results.append({'id': item['id'], 'ok': True, 'status': complaint.status})
+            
+            Complaint.objects.bulk_update(
+                changed.values(), bulk_action.update_fields + ['updated_at'], batch_size=500
+            )
+        
+        if changed:
+            invalidate_complaint_stats()
+            publish_complaint_event(bulk_action.event_type, list(changed.values()))
+        return Response({'updated': len(changed), 'results': results})
+
+
+class AutoDispatchView(APIView):
+    """
+    Plan collector assignments for open complaints by proximity and
+    workload. A dry run by default; with apply=true the plan is written.
+    """
+    throttle_classes = [ActionThrottle]
+    
+    def post(self, request):
+        serializer = AutoDispatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        complaints = Complaint.objects.all()
+        if 'complaint_ids' in data:
+            complaints = complaints.filter(pk__in=data['complaint_ids'])
+        collectors = User.objects.all()
+        if 'collector_ids' in data:
+            collectors = collectors.filter(pk__in=data['collector_ids'])
+        
+        plan = plan_dispatch(
+            complaints, collectors,
+            load_penalty=data.get('load_penalty_meters'), max_open=data.get('max_open'),
+        )
+        
+        applied = 0
+        if data['apply'] and plan['assignments']:
+            assigned_by = request.user if request.user.is_authenticated else None
+            applied = len(apply_dispatch(plan['assignments'], assigned_by))
+        
+        return Response({
+            'applied': data['apply'],
+            'assigned_count': applied if data['apply'] else len(plan['assignments']),
+            **plan,
+        })
+
+
 class SimulateTimeoutView(APIView):
+    """
+    Escalate the given complaints now, or without ids everything past its
+    deadline. run_escalations does the latter continuously.
+    """
+    throttle_classes = [ActionThrottle]
+    
     def post(self, request):
         complaint_ids = request.data.get('complaint_ids', [])
         
         if complaint_ids:
             # Assuming IDs are PKs
-            updated_count = Complaint.objects.filter(id__in=complaint_ids).update(status='ESCALATED')
+            escalated = escalate(Complaint.objects.filter(id__in=complaint_ids))
         else:
-            # 16h logic
-            cutoff = timezone.now() - timedelta(hours=16)
-            updated_count = Complaint.objects.filter(
-                status__in=['PENDING', 'ASSIGNED'],
-                created_at__lt=cutoff
-            ).update(status='ESCALATED')
-
-            # Force escalate logic if we had a field for it, assumed force_escalate=True also triggers
-            updated_count += Complaint.objects.filter(
-                 status__in=['PENDING', 'ASSIGNED'],
-                 force_escalate=True
-            ).update(status='ESCALATED')
+            escalated = []
+            while True:
+                batch = escalate_due()
+                escalated += batch
+                if len(batch) < settings.ESCALATION_BATCH_SIZE:
+                    break
             
-        return Response({'message': f'{updated_count} escalated'})
+        return Response({'message': f'{len(escalated)} escalated'})
 
 
 @api_view(['GET'])
 def dashboard_stats(request):
-    total = Complaint.objects.count()
-    pending = Complaint.objects.filter(status='PENDING').count()
-    assigned = Complaint.objects.filter(status='ASSIGNED').count()
-    resolved = Complaint.objects.filter(status='RESOLVED').count()
-    rejected = Complaint.objects.filter(status='REJECTED').count()
-    escalated = Complaint.objects.filter(status='ESCALATED').count()
+    stats = get_complaint_stats()
+    data = dict(stats['totals'])
+    
+    # Optional per-collector breakdown from the same aggregation pass
+    if request.query_params.get('breakdown') == 'collector':
+        data['by_collector'] = stats['by_collector']
+    
+    etag = make_etag(request.get_full_path(), sorted(data.items()))
+    return conditional_response(request, etag, lambda: Response(data))
+
+
+@require_GET
+def complaint_events(request):
+    """
+    Server-Sent Events stream of complaint create/assign/resolve/reject/escalate
+    events. Staff see everything, collectors their assigned complaints and
+    citizens their own.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Not authenticated'}, status=401)
     
-    return Response({
-        'total': total,
-        'pending': pending,
-        'assigned': assigned,
-        'resolved': resolved,
-        'rejected': rejected,
-        'escalated': escalated,
-        'active': pending + assigned + escalated
-    })
+    subscriber = bus.subscribe(request.user)
+    response = StreamingHttpResponse(stream_events(subscriber), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -26,6 +26,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its timings and query counts cover the whole stack
+    'api.instrumentation.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -63,14 +65,37 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Seconds a writer waits for SQLite's write lock before failing
+            'timeout': 20,
+        },
+        # A file, not the default shared in-memory database, whose table locks
+        # fail at once instead of waiting: the concurrency tests need real
+        # SQLite locking between connections
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
-# MongoDB Configuration
-import pymongo
+# MongoDB Configuration. The client is created on first use through
+# api.connections (connections.get('mongo') / mongo_db()), not at import.
 MONGO_URI = 'mongodb://localhost:27017'
-MONGO_CLIENT = pymongo.MongoClient(MONGO_URI)
-MONGO_DB = MONGO_CLIENT['citycare_db']
+MONGO_DB_NAME = 'citycare_db'
+
+# Cache (per-process; swap for Redis/Memcached when running several workers)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Seconds a dashboard stats snapshot may be served from cache
+STATS_CACHE_TTL = 5
+
+# Days deletion tombstones are kept for delta sync (manage.py prune_tombstones).
+# Clients that last synced before the window are told to resync.
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
 
 # Custom User Model
 AUTH_USER_MODEL = 'api.User'
@@ -99,6 +124,22 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # JSON rendering is timed for the Server-Timing header
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.instrumentation.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Used by the sliding-window throttles in api/throttling.py
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/min',
+        'complaint_create': '30/hour',
+        'complaint_spot': '5/hour',
+        'actions': '300/min',
+    },
+    # Throttles key on the client IP. Unset, DRF takes it from X-Forwarded-For,
+    # which any client can spoof; set to the number of trusted proxies in front
+    # of the app (0: use REMOTE_ADDR only)
+    'NUM_PROXIES': 0,
 }
 
 # CORS Configuration
@@ -128,4 +169,94 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Hand media transfers to the web server: None, 'x-sendfile' (Apache/lighttpd)
+# or 'x-accel-redirect' (nginx, with an internal location at the prefix below)
+MEDIA_SENDFILE_BACKEND = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# Uploads stream to disk (no in-memory buffering). Keep the temp dir on
+# MEDIA_ROOT's filesystem, so storing an upload is a rename, but outside
+# MEDIA_ROOT: everything under it is served publicly.
+FILE_UPLOAD_HANDLERS = ['api.uploads.BoundedImageUploadHandler']
+FILE_UPLOAD_TEMP_DIR = os.path.join(BASE_DIR, 'upload_tmp')
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_UPLOAD_PIXELS = 40_000_000
+
+# Background photo processing (renditions); set ASYNC to False to run inline
+IMAGE_PIPELINE_ASYNC = True
+IMAGE_PIPELINE_WORKERS = 2
+
+# Auto-dispatch: each open job a collector holds costs this many metres of
+# extra travel when matching, and nobody is given more than MAX_OPEN jobs
+DISPATCH_LOAD_PENALTY_METERS = 500
+DISPATCH_MAX_OPEN_PER_COLLECTOR = 25
+# Fallback position (Coimbatore) for collectors with no home or open work
+DISPATCH_DEFAULT_CENTER = (11.0168, 76.9558)
+
+# Collector route optimisation: travel model, deadlines as
+# (minimum urgency, minutes from route start), and the cost in metres of
+# each minute an urgent stop is reached late
+ROUTE_SPEED_KMH = 20
+ROUTE_SERVICE_MINUTES = 10
+ROUTE_URGENCY_DEADLINES = ((5, 60), (3, 180))
+ROUTE_LATENESS_PENALTY_METERS = 200
+ROUTE_CACHE_TTL = 60 * 60
+# Bounds on route planning: the most urgent ROUTE_MAX_STOPS stops are routed,
+# and 2-opt stops improving after ROUTE_OPTIMISE_SECONDS
+ROUTE_MAX_STOPS = 200
+ROUTE_OPTIMISE_SECONDS = 1.0
+
+# Escalation SLA as (minimum urgency, hours open); the last entry applies
+# to everything below it. The default is the original rule: every open
+# complaint escalates 16 hours after it was reported. Tiers are opt-in,
+# e.g. ((5, 4), (3, 8), (1, 16)). With ESCALATION_RESTART_ON_ASSIGN each
+# (re)assignment restarts the clock, so reassigning postpones escalation.
+# run_escalations works in batches of BATCH_SIZE.
+ESCALATION_SLA_HOURS = ((1, 16),)
+ESCALATION_RESTART_ON_ASSIGN = False
+ESCALATION_BATCH_SIZE = 500
+
+# Request instrumentation (api/instrumentation.py). The Server-Timing header
+# reveals query counts and timings to any client, so it is only sent in
+# development. Set REQUEST_PROFILING to e.g.
+# {'threshold_ms': 500, 'sample_rate': 0.05} to cProfile a sample of
+# requests and keep profiles of slow ones under BASE_DIR / 'profiles'.
+SERVER_TIMING_HEADER = DEBUG
+REQUEST_PROFILING = None
+# Per-request metrics as JSON lines on the 'api.requests' logger: off by
+# default; 'stderr' or a file path to write them there
+REQUEST_LOG = None
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'api.instrumentation.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        # Per-request metrics as JSON lines, written off the request thread
+        'requests': {
+            'class': 'api.instrumentation.BackgroundQueueHandler',
+            'formatter': 'json',
+            'filename': None if REQUEST_LOG == 'stderr' else REQUEST_LOG,
+        } if REQUEST_LOG else {
+            'class': 'logging.NullHandler',
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'api.requests': {
+            'handlers': ['requests'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -25,8 +25,35 @@ export const getCollectors = () =>
     api.get('/users/collectors/');
 
 // Complaints
+// The list is keyset-paginated ({ next, results }); pass { cursor } to
+// fetch the following page. `data` is unwrapped to the current page's rows.
 export const getComplaints = (params = {}) =>
-    api.get('/complaints/', { params });
+    api.get('/complaints/', { params }).then(res => ({
+        ...res,
+        data: res.data.results ?? res.data,
+        next: res.data.next ?? null,
+    }));
+
+// Every matching complaint: follows `next` until the list is exhausted,
+// fetching the largest page the API allows. Only the cursor is taken from
+// `next`, which is an absolute URL of the backend host. Meant for small
+// filtered sets (a collector's tasks); dashboards that poll the whole table
+// use delta sync (useComplaintSync) instead.
+export const getAllComplaints = async (params = {}) => {
+    let res = await getComplaints({ page_size: 500, ...params });
+    const rows = [...res.data];
+    while (res.next) {
+        const cursor = new URL(res.next).searchParams.get('cursor');
+        res = await getComplaints({ page_size: 500, ...params, cursor });
+        rows.push(...res.data);
+    }
+    return { ...res, data: rows };
+};
+
+// Delta sync: rows changed since `since` (the watermark from the last call),
+// at most `limit` (the API allows up to 5000) per call
+export const getComplaintChanges = (since, limit) =>
+    api.get('/complaints/changes/', { params: { ...(since ? { since } : {}), ...(limit ? { limit } : {}) } });
 
 export const createComplaint = (formData) =>
     api.post('/complaints/', formData, {
@@ -44,6 +71,24 @@ export const resolveComplaint = (complaintId, formData) =>
 export const rejectComplaint = (complaintId, reason) =>
     api.post(`/complaints/${complaintId}/reject/`, { reason });
 
+// Bulk actions: `items` carry per-complaint values, e.g. [{ id, collector_id }]
+export const bulkAssignComplaints = (items) =>
+    api.post('/complaints/bulk/assign/', { items });
+
+export const bulkResolveComplaints = (complaintIds) =>
+    api.post('/complaints/bulk/resolve/', { ids: complaintIds });
+
+export const bulkRejectComplaints = (items) =>
+    api.post('/complaints/bulk/reject/', { items });
+
+// Auto-dispatch: a dry run unless apply is true
+export const autoDispatch = (apply = false, complaintIds) =>
+    api.post('/dispatch/', complaintIds ? { apply, complaint_ids: complaintIds } : { apply });
+
+// Optimised visiting order; start is an optional "lat,lng" (e.g. current GPS position)
+export const getCollectorRoute = (collectorId, start) =>
+    api.get(`/users/${collectorId}/route/`, { params: start ? { start } : {} });
+
 // Simulation & Stats
 export const simulateTimeout = (complaintIds = []) =>
     api.post('/simulate-timeout/', { complaint_ids: complaintIds });
@@ -51,4 +96,13 @@ export const simulateTimeout = (complaintIds = []) =>
 export const getDashboardStats = () =>
     api.get('/stats/');
 
+// Live updates (Server-Sent Events). Returns the EventSource; call .close() to stop.
+export const subscribeToComplaintEvents = (onEvent) => {
+    const source = new EventSource('/api/events/', { withCredentials: true });
+    ['created', 'updated', 'assigned', 'resolved', 'rejected', 'escalated', 'resync'].forEach(type =>
+        source.addEventListener(type, e => onEvent(type, JSON.parse(e.data)))
+    );
+    return source;
+};
+
 export default api;
@@ -0,0 +1,76 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
+import { getComplaintChanges, subscribeToComplaintEvents } from './index';
+
+// Rows per request; large, so the first (full) sync takes few round trips
+const BATCH_SIZE = 2000;
+
+// Same order as the complaint list: most urgent, then newest first
+const byPriority = (a, b) =>
+    b.urgency_level - a.urgency_level ||
+    new Date(b.created_at) - new Date(a.created_at) ||
+    b.id - a.id;
+
+// Keeps a local copy of every complaint up to date through delta sync:
+// the first call downloads everything, later calls only what changed or
+// was deleted since the last watermark. A sync runs whenever the live
+// event stream reports a change, and every `interval` ms as a fallback
+// for events missed while disconnected. Returns the complaints in list
+// order, whether the first sync is still running and a function that
+// syncs at once (e.g. after an action).
+const useComplaintSync = ({ interval = 60000, onError } = {}) => {
+    const rows = useRef(new Map());
+    const watermark = useRef(null);
+    const running = useRef(null);
+    const pending = useRef(false);
+    const [complaints, setComplaints] = useState([]);
+    const [loading, setLoading] = useState(true);
+    const onErrorRef = useRef(onError);
+    onErrorRef.current = onError;
+
+    const sync = useCallback(() => {
+        // One sync at a time; a request arriving meanwhile runs once more after it
+        if (running.current) {
+            pending.current = true;
+            return running.current;
+        }
+        running.current = (async () => {
+            try {
+                let hasMore = true;
+                while (hasMore) {
+                    const { data } = await getComplaintChanges(watermark.current, BATCH_SIZE);
+                    if (data.resync) rows.current.clear();
+                    data.changed.forEach(row => rows.current.set(row.id, row));
+                    data.deleted.forEach(id => rows.current.delete(id));
+                    watermark.current = data.watermark ?? watermark.current;
+                    hasMore = data.has_more;
+                }
+                setComplaints([...rows.current.values()].sort(byPriority));
+                setLoading(false);
+            } catch (err) {
+                onErrorRef.current?.(err);
+            } finally {
+                running.current = null;
+                if (pending.current) {
+                    pending.current = false;
+                    sync();
+                }
+            }
+        })();
+        return running.current;
+    }, []);
+
+    useEffect(() => {
+        sync();
+        // Any event, including "resync" after dropped events, means "fetch the delta"
+        const events = subscribeToComplaintEvents(() => sync());
+        const timer = setInterval(sync, interval);
+        return () => {
+            events.close();
+            clearInterval(timer);
+        };
+    }, [sync, interval]);
+
+    return { complaints, loading, sync };
+};
+
+export default useComplaintSync;
@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { useNavigate } from 'react-router-dom';
 import GlassCard from '../components/GlassCard';
-import { getComplaints, resolveComplaint, rejectComplaint, logout, simulateTimeout } from '../api';
+import { getAllComplaints, resolveComplaint, rejectComplaint, logout, simulateTimeout } from '../api';
 
 const CollectorDashboard = () => {
     const navigate = useNavigate();
@@ -28,7 +28,7 @@ const CollectorDashboard = () => {
             if (!userStr) { navigate('/login/collector'); return; }
             const user = JSON.parse(userStr);
 
-            const res = await getComplaints({ assigned_to: user.id, status: 'ASSIGNED' });
+            const res = await getAllComplaints({ assigned_to: user.id, status: 'ASSIGNED' });
             setTasks(res.data);
             setLoading(false);
         } catch (err) {
@@ -133,7 +133,7 @@ const CollectorDashboard = () => {
                                         {/* Left: Image & Info */}
                                         <div className="flex-1 flex gap-4">
                                             <img
-                                                src={task.image_before}
+                                                src={task.image_before_renditions?.thumb || task.image_before}
                                                 alt="Task"
                                                 className="w-24 h-24 rounded-lg object-cover bg-black/20"
                                             />
@@ -2,49 +2,46 @@ import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { useNavigate } from 'react-router-dom';
 import GlassCard from '../components/GlassCard';
-import { getComplaints, getCollectors, assignComplaint, logout } from '../api';
+import { getCollectors, assignComplaint, logout } from '../api';
+import useComplaintSync from '../api/useComplaintSync';
 
 const InspectorDashboard = () => {
     const navigate = useNavigate();
-    const [complaints, setComplaints] = useState([]);
     const [collectors, setCollectors] = useState([]);
-    const [loading, setLoading] = useState(true);
     const [selectedComplaint, setSelectedComplaint] = useState(null);
 
-    // Poll for updates
+    const handleError = (err) => {
+        console.error("Failed to fetch data", err);
+        // Redirect to login if unauthorized
+        if (err.response?.status === 401) navigate('/login/inspector');
+    };
+    // Live updates: each event fetches only what changed (delta sync)
+    const { complaints: allComplaints, loading, sync } = useComplaintSync({ onError: handleError });
+    const complaints = allComplaints.filter(c => c.status === 'PENDING' || c.status === 'ESCALATED');
+
     useEffect(() => {
-        fetchData();
-        const interval = setInterval(fetchData, 30000); // 30s polling
-        return () => clearInterval(interval);
+        fetchCollectors();
     }, []);
 
-    const fetchData = async () => {
+    const fetchCollectors = async () => {
         try {
-            const [complaintsRes, collectorsRes] = await Promise.all([
-                getComplaints({ status: 'PENDING,ESCALATED' }),
-                getCollectors()
-            ]);
-            setComplaints(complaintsRes.data);
+            const collectorsRes = await getCollectors();
             // Add simulated distance to collectors
             const collectorsWithDistance = collectorsRes.data.map(c => ({
                 ...c,
                 distance: (Math.random() * 5).toFixed(1) // Random 0-5km
             }));
             setCollectors(collectorsWithDistance.sort((a, b) => a.distance - b.distance));
-            setLoading(false);
         } catch (err) {
-            console.error("Failed to fetch data", err);
-            // Redirect to login if unauthorized
-            if (err.response?.status === 401) navigate('/login/inspector');
+            handleError(err);
         }
     };
 
     const handleAssign = async (complaintId, collectorId) => {
         try {
             await assignComplaint(complaintId, collectorId);
-            // Optimistic update
-            setComplaints(prev => prev.filter(c => c.id !== complaintId));
             setSelectedComplaint(null);
+            sync();
         } catch (err) {
             alert("Failed to assign complaint");
         }
@@ -112,7 +109,7 @@ const InspectorDashboard = () => {
                                             {complaint.image_before ? (
                                                 <div className="h-40 mb-4 rounded-lg overflow-hidden relative group">
                                                     <img
-                                                        src={complaint.image_before}
+                                                        src={complaint.image_before_renditions?.display || complaint.image_before}
                                                         alt="Evidence"
                                                         className="w-full h-full object-cover group-hover:scale-110 transition duration-500"
                                                     />
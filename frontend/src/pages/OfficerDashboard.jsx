@@ -2,34 +2,33 @@ import React, { useState, useEffect } from 'react';
 import { motion } from 'framer-motion';
 import { useNavigate } from 'react-router-dom';
 import GlassCard from '../components/GlassCard';
-import { getComplaints, getDashboardStats, logout } from '../api';
+import { getDashboardStats, logout } from '../api';
+import useComplaintSync from '../api/useComplaintSync';
 
 const OfficerDashboard = () => {
     const navigate = useNavigate();
     const [stats, setStats] = useState({
         total: 0, pending: 0, assigned: 0, resolved: 0, rejected: 0, escalated: 0, active: 0
     });
-    const [complaints, setComplaints] = useState([]);
-    const [loading, setLoading] = useState(true);
     const [filter, setFilter] = useState('ALL');
+    const handleError = (err) => {
+        if (err.response?.status === 401) navigate('/login/officer');
+    };
+    // Every complaint for the table, kept current by live events and delta sync
+    const { complaints } = useComplaintSync({ onError: handleError });
 
     useEffect(() => {
-        fetchData();
-        const interval = setInterval(fetchData, 10000); // Live updates
+        fetchStats();
+        const interval = setInterval(fetchStats, 10000); // Live updates
         return () => clearInterval(interval);
     }, []);
 
-    const fetchData = async () => {
+    const fetchStats = async () => {
         try {
-            const [statsRes, complaintsRes] = await Promise.all([
-                getDashboardStats(),
-                getComplaints() // Fetch all for table
-            ]);
+            const statsRes = await getDashboardStats();
             setStats(statsRes.data);
-            setComplaints(complaintsRes.data);
-            setLoading(false);
         } catch (err) {
-            if (err.response?.status === 401) navigate('/login/officer');
+            handleError(err);
         }
     };
 